@@ -1,7 +1,22 @@
+import io
+import os
+import time
+
+import numpy as np
+import pandas as pd
 import streamlit as st
 from PIL import Image
 import plotly.graph_objects as go
 
+from clustering import (FEATURE_SETS, clustering_matrix, cut_tree, hierarchical_summary, minibatch_kmeans,
+                        project_2d, sample_points, truncated_dendrogram)
+from data import CATEGORY_COLS, load_data
+from evaluate import (METRICS_PATH, class_leaders, load_metrics_store, report_table, summary_table,
+                      test_class_counts, top_confusion)
+from models import COMPARISON_PATH
+from tuning import TUNING_PATH
+from predict import CLASS_LABELS, MODEL_PATH, load_pipeline, predict_batch
+
 # ======================
 # Page Configuration
 # ======================
@@ -132,6 +147,252 @@ st.markdown("""
 </style>
 """, unsafe_allow_html=True)
 
+# ======================
+# Cached resources
+# ======================
+@st.cache_resource
+def get_pipeline(path=MODEL_PATH):
+    return load_pipeline(path)
+
+@st.cache_data
+def get_record_count():
+    # Only the target column is read from the typed Parquet cache
+    try:
+        return len(load_data(columns=['readmitted']))
+    except FileNotFoundError:
+        return 101766
+
+# Keyed on the file's mtime so a new evaluation run shows up without a restart
+@st.cache_data
+def _read_metrics_store(path, mtime):
+    return load_metrics_store(path)
+
+def get_metrics_store(path=METRICS_PATH):
+    return _read_metrics_store(path, os.path.getmtime(path))
+
+# Keyed on the file's mtime like the metrics store, so reruns show up without a restart
+@st.cache_data
+def _read_results_csv(path, mtime):
+    return pd.read_csv(path)
+
+def get_backend_comparison(path=COMPARISON_PATH):
+    return _read_results_csv(path, os.path.getmtime(path))
+
+def get_tuning_results(path=TUNING_PATH):
+    return _read_results_csv(path, os.path.getmtime(path))
+
+# Static PNGs are downscaled and re-encoded as WebP once per file version
+ASSET_MAX_WIDTH = 1000
+
+@st.cache_data(show_spinner=False)
+def _encode_asset(path, mtime, max_width):
+    with Image.open(path) as img:
+        img.thumbnail((max_width, max_width * 4))
+        buffer = io.BytesIO()
+        img.save(buffer, format='WEBP', quality=85)
+    return buffer.getvalue()
+
+def load_asset(path, max_width=ASSET_MAX_WIDTH):
+    return _encode_asset(path, os.path.getmtime(path), max_width)
+
+@st.cache_resource
+def target_distribution_figure(counts):
+    fig = go.Figure(data=[
+        go.Bar(
+            x=[f"{label} ({i})" for i, label in enumerate(CLASS_LABELS)],
+            y=list(counts),
+            marker=dict(
+                color=['#2E86AB', '#A23B72', '#F18F01'],
+                line=dict(color='white', width=2)
+            ),
+            text=list(counts),
+            textposition='auto',
+            textfont=dict(size=14, color='white', family='Arial Black')
+        )
+    ])
+    
+    fig.update_layout(
+        title=dict(
+            text="Readmission Class Distribution (Test Set)",
+            font=dict(size=20, color='#1A1A2E', family='Arial Black')
+        ),
+        xaxis_title="Readmission Class",
+        yaxis_title="Number of Patients",
+        height=400,
+        plot_bgcolor='rgba(0,0,0,0)',
+        paper_bgcolor='rgba(0,0,0,0)',
+        font=dict(size=12, color='#1A1A2E')
+    )
+    return fig
+
+@st.cache_resource
+def model_comparison_figure(summary):
+    fig = go.Figure()
+    
+    for metric, label, color in [
+        ('accuracy', 'Accuracy', '#2E86AB'),
+        ('macro_precision', 'Macro Precision', '#A23B72'),
+        ('macro_recall', 'Macro Recall', '#F18F01'),
+        ('macro_f1', 'Macro F1', '#06A77D'),
+    ]:
+        values = (summary[metric] * 100).round(2)
+        fig.add_trace(go.Bar(
+            name=label,
+            x=summary['model'],
+            y=values,
+            text=values,
+            textposition='auto',
+            marker_color=color
+        ))
+    
+    fig.update_layout(
+        title=dict(
+            text="Model Performance Comparison (%)",
+            font=dict(size=20, color='#1A1A2E')
+        ),
+        xaxis_title="Model",
+        yaxis_title="Score (%)",
+        barmode='group',
+        height=450,
+        plot_bgcolor='rgba(0,0,0,0)',
+        paper_bgcolor='rgba(0,0,0,0)'
+    )
+    return fig
+
+CARD_GRADIENTS = [('#2E86AB', '#1A5F7A'), ('#F18F01', '#C46D00'), ('#A23B72', '#6E2347'), ('#06A77D', '#047857')]
+
+MODEL_ICONS = {'bagging': '🌳', 'boosting': '🚀', 'hist_boosting': '📊'}
+
+@st.cache_resource
+def confusion_figure(name, matrix):
+    axis = [f"{label} ({i})" for i, label in enumerate(CLASS_LABELS)]
+    fig = go.Figure(data=[
+        go.Heatmap(
+            z=matrix,
+            x=axis,
+            y=axis,
+            text=[[f"{v:,}" for v in row] for row in matrix],
+            texttemplate="%{text}",
+            colorscale='Blues',
+            hovertemplate="Actual %{y}<br>Predicted %{x}<br>%{z:,} encounters<extra></extra>"
+        )
+    ])
+    fig.update_layout(
+        title=dict(text=f"{name} - Confusion Matrix", font=dict(size=18, color='#1A1A2E')),
+        xaxis_title="Predicted",
+        yaxis_title="Actual",
+        yaxis=dict(autorange='reversed'),
+        height=450,
+        plot_bgcolor='rgba(0,0,0,0)',
+        paper_bgcolor='rgba(0,0,0,0)'
+    )
+    return fig
+
+@st.cache_resource
+def backend_metric_figure(backends, metric, title, color):
+    fig = go.Figure(data=[
+        go.Bar(
+            x=backends['model'],
+            y=backends[metric],
+            text=backends[metric].round(3),
+            textposition='auto',
+            marker_color=color
+        )
+    ])
+    fig.update_layout(
+        title=dict(text=title, font=dict(size=16, color='#1A1A2E')),
+        height=350,
+        plot_bgcolor='rgba(0,0,0,0)',
+        paper_bgcolor='rgba(0,0,0,0)'
+    )
+    return fig
+
+CLUSTER_COLORS = ['#E41A1C', '#377EB8', '#4DAF4A', '#984EA3', '#FF7F00',
+                  '#A65628', '#F781BF', '#999999', '#66C2A5', '#FFD92F']
+
+@st.cache_resource(show_spinner="Preparing clustering matrix...")
+def get_clustering_matrix(feature_set):
+    return clustering_matrix(feature_set)
+
+@st.cache_data(show_spinner="Projecting patients to 2D...")
+def get_projection(feature_set):
+    Xt, _ = get_clustering_matrix(feature_set)
+    return project_2d(Xt)
+
+@st.cache_data(show_spinner="Clustering patients...")
+def get_kmeans_labels(k, feature_set):
+    Xt, _ = get_clustering_matrix(feature_set)
+    _, labels = minibatch_kmeans(Xt, k)
+    return labels
+
+@st.cache_resource
+def kmeans_figure(k, feature_set, max_points):
+    coords = get_projection(feature_set)
+    labels = get_kmeans_labels(k, feature_set)
+    rows = sample_points(len(labels), max_points)
+
+    fig = go.Figure()
+    for cluster in range(k):
+        members = rows[labels[rows] == cluster]
+        fig.add_trace(go.Scattergl(
+            x=coords[members, 0],
+            y=coords[members, 1],
+            mode='markers',
+            name=f"Cluster {cluster}",
+            marker=dict(size=3, opacity=0.6, color=CLUSTER_COLORS[cluster % len(CLUSTER_COLORS)])
+        ))
+    fig.update_layout(
+        title=dict(
+            text=f"K-Means Clustering (k={k}) - 2D SVD projection",
+            font=dict(size=20, color='#1A1A2E')
+        ),
+        xaxis_title="Component 1",
+        yaxis_title="Component 2",
+        height=550,
+        legend=dict(itemsizing='constant'),
+        plot_bgcolor='rgba(0,0,0,0)',
+        paper_bgcolor='rgba(0,0,0,0)'
+    )
+    return fig
+
+@st.cache_data(show_spinner="Building cluster hierarchy...")
+def get_hierarchy(feature_set):
+    Xt, _ = get_clustering_matrix(feature_set)
+    return hierarchical_summary(Xt)
+
+@st.cache_resource
+def dendrogram_figure(feature_set, n_leaves):
+    Z, _, micro_sizes = get_hierarchy(feature_set)
+    tree = truncated_dendrogram(Z, micro_sizes, p=n_leaves)
+
+    fig = go.Figure()
+    for xs, ys in zip(tree['icoord'], tree['dcoord']):
+        fig.add_trace(go.Scatter(
+            x=xs,
+            y=ys,
+            mode='lines',
+            line=dict(color='#2E86AB', width=1.5),
+            hoverinfo='y',
+            showlegend=False
+        ))
+    fig.update_layout(
+        title=dict(
+            text="Hierarchical Clustering Dendrogram (Ward, all patients)",
+            font=dict(size=20, color='#1A1A2E')
+        ),
+        xaxis=dict(
+            tickvals=[5 + 10 * i for i in range(len(tree['ivl']))],
+            ticktext=tree['ivl'],
+            tickangle=-90,
+            title="Patients per branch"
+        ),
+        yaxis_title="Distance",
+        height=500,
+        plot_bgcolor='rgba(0,0,0,0)',
+        paper_bgcolor='rgba(0,0,0,0)'
+    )
+    return fig
+
 # ======================
 # Sidebar
 # ======================
@@ -148,7 +409,7 @@ st.sidebar.markdown("""
 
 section = st.sidebar.radio(
     "📊 Navigate",
-    ["🏠 Home", "📁 Dataset Overview", "🤖 Classification Models", "🔍 Clustering Results"],
+    ["🏠 Home", "📁 Dataset Overview", "🤖 Classification Models", "🔍 Clustering Results", "🔮 Predict"],
     index=0
 )
 
@@ -171,7 +432,7 @@ if section == "🏠 Home":
     # Metrics
     col1, col2, col3, col4 = st.columns(4)
     with col1:
-        st.metric("📊 Total Records", "101,766", "10 Years Data")
+        st.metric("📊 Total Records", f"{get_record_count():,}", "10 Years Data")
     with col2:
         st.metric("🏥 Hospitals", "130", "US Facilities")
     with col3:
@@ -236,49 +497,30 @@ if section == "🏠 Home":
     # Target distribution visualization
     st.markdown("<h2 class='section-header'>📊 Target Distribution Analysis</h2>", unsafe_allow_html=True)
     
-    col1, col2 = st.columns([2, 1])
-    
-    with col1:
-        fig = go.Figure(data=[
-            go.Bar(
-                x=['NO (0)', '>30 (1)', '<30 (2)'],
-                y=[10973, 7109, 2272],
-                marker=dict(
-                    color=['#2E86AB', '#A23B72', '#F18F01'],
-                    line=dict(color='white', width=2)
-                ),
-                text=[10973, 7109, 2272],
-                textposition='auto',
-                textfont=dict(size=14, color='white', family='Arial Black')
-            )
-        ])
+    try:
+        counts = test_class_counts(get_metrics_store())
+    except FileNotFoundError:
+        st.info("ℹ️ Run `python evaluate.py` to compute the test-set class distribution.")
+    else:
+        shares = dict(zip(CLASS_LABELS, np.array(counts) / sum(counts)))
+        majority = max(shares, key=shares.get)
+        col1, col2 = st.columns([2, 1])
         
-        fig.update_layout(
-            title=dict(
-                text="Readmission Class Distribution (Test Set)",
-                font=dict(size=20, color='#1A1A2E', family='Arial Black')
-            ),
-            xaxis_title="Readmission Class",
-            yaxis_title="Number of Patients",
-            height=400,
-            plot_bgcolor='rgba(0,0,0,0)',
-            paper_bgcolor='rgba(0,0,0,0)',
-            font=dict(size=12, color='#1A1A2E')
-        )
-        st.plotly_chart(fig, use_container_width=True)
-    
-    with col2:
-        st.markdown("""
-        <div class='info-box'>
-            <h4>📈 Key Statistics</h4>
-            <ul style='line-height: 2;'>
-                <li><strong>Test Set Size:</strong> 20,354 patients</li>
-                <li><strong>Majority Class:</strong> NO readmission (54%)</li>
-                <li><strong>High Risk:</strong> <30 days (11%)</li>
-                <li><strong>Class Imbalance:</strong> Present, addressed in modeling</li>
-            </ul>
-        </div>
-        """, unsafe_allow_html=True)
+        with col1:
+            st.plotly_chart(target_distribution_figure(tuple(counts)), use_container_width=True)
+        
+        with col2:
+            st.markdown(f"""
+            <div class='info-box'>
+                <h4>📈 Key Statistics</h4>
+                <ul style='line-height: 2;'>
+                    <li><strong>Test Set Size:</strong> {sum(counts):,} encounters</li>
+                    <li><strong>Majority Class:</strong> {majority} readmission ({shares[majority]:.0%})</li>
+                    <li><strong>High Risk:</strong> <30 days ({shares['<30']:.0%})</li>
+                    <li><strong>Class Imbalance:</strong> Present, addressed in modeling</li>
+                </ul>
+            </div>
+            """, unsafe_allow_html=True)
 
 # ======================
 # 📁 Dataset Overview
@@ -502,206 +744,156 @@ elif section == "🤖 Classification Models":
     </div>
     """, unsafe_allow_html=True)
     
-    # Model comparison
-    st.markdown("<h2 class='section-header'>📊 Model Performance</h2>", unsafe_allow_html=True)
-    col1, col2 = st.columns(2)
-    
-    with col1:
-        st.markdown("""
-        <div style='background: linear-gradient(135deg, #2E86AB 0%, #1A5F7A 100%); padding: 40px; border-radius: 15px; text-align: center; box-shadow: 0 8px 16px rgba(0,0,0,0.1);'>
-            <h3 style='color: white; margin: 0;'>🌳 Bagging Classifier</h3>
-            <h1 style='color: white; font-size: 4rem; margin: 20px 0;'>68.7%</h1>
-            <p style='color: #E0E0E0; font-size: 1.1rem; margin: 0;'>Random Forest Base</p>
-        </div>
-        """, unsafe_allow_html=True)
-    
-    with col2:
-        st.markdown("""
-        <div style='background: linear-gradient(135deg, #F18F01 0%, #C46D00 100%); padding: 40px; border-radius: 15px; text-align: center; box-shadow: 0 8px 16px rgba(241,143,1,0.3);'>
-            <h3 style='color: white; margin: 0;'>🚀 Gradient Boosting</h3>
-            <h1 style='color: white; font-size: 4rem; margin: 20px 0;'>69.8%</h1>
-            <p style='color: white; font-size: 1.1rem; margin: 0;'>Best Performer 🏆</p>
-        </div>
-        """, unsafe_allow_html=True)
-    
-    st.markdown("---")
-    
-    # Detailed metrics
-    tab1, tab2, tab3 = st.tabs(["📈 Bagging Results", "🚀 Boosting Results", "⚖️ Comparison"])
+    try:
+        store = get_metrics_store()
+    except FileNotFoundError:
+        store = None
+        st.info("ℹ️ No evaluated models yet. Run `python evaluate.py` to compute test-set metrics for the dashboard.")
+        for path, caption in [("bagging_classifier.png", "Bagging Classifier Confusion Matrix"),
+                              ("gradient_boosting.png", "Gradient Boosting Confusion Matrix")]:
+            try:
+                st.image(load_asset(path), caption=caption, use_container_width=True)
+            except OSError:
+                pass
     
-    with tab1:
-        st.markdown("<h2 class='section-header'>🌳 Bagging Classifier (Random Forest)</h2>", unsafe_allow_html=True)
+    if store:
+        summary = summary_table(store)
+        ranked = summary.sort_values('accuracy', ascending=False)
+        best = ranked.iloc[0]
         
-        col1, col2 = st.columns([1, 2])
-        with col1:
-            st.markdown("""
-            <div class='info-box'>
-                <h4>Model Details</h4>
-                <ul style='line-height: 2;'>
-                    <li><strong>Algorithm:</strong> Bagging with Random Forest</li>
-                    <li><strong>Accuracy:</strong> 68.68%</li>
-                    <li><strong>Macro F1:</strong> 0.73</li>
-                    <li><strong>Weighted F1:</strong> 0.67</li>
-                </ul>
-            </div>
-            """, unsafe_allow_html=True)
+        # Model comparison
+        st.markdown("<h2 class='section-header'>📊 Model Performance</h2>", unsafe_allow_html=True)
+        for i, (col, row) in enumerate(zip(st.columns(len(summary)), summary.itertuples())):
+            start, end = CARD_GRADIENTS[i % len(CARD_GRADIENTS)]
+            badge = "Best Performer 🏆" if row.backend == best['backend'] else f"Macro F1 {row.macro_f1:.2f}"
+            with col:
+                st.markdown(f"""
+                <div style='background: linear-gradient(135deg, {start} 0%, {end} 100%); padding: 40px; border-radius: 15px; text-align: center; box-shadow: 0 8px 16px rgba(0,0,0,0.1);'>
+                    <h3 style='color: white; margin: 0;'>{MODEL_ICONS.get(row.backend, '🤖')} {row.model}</h3>
+                    <h1 style='color: white; font-size: 4rem; margin: 20px 0;'>{row.accuracy:.1%}</h1>
+                    <p style='color: #E0E0E0; font-size: 1.1rem; margin: 0;'>{badge}</p>
+                </div>
+                """, unsafe_allow_html=True)
         
-        with col2:
-            st.markdown("#### 📊 Classification Report")
-            st.markdown("""
-            <div class='stats-container'>
-            
-            | Class | Precision | Recall | F1-Score | Support |
-            |-------|-----------|--------|----------|---------|
-            | **NO (0)** | 0.67 | 0.84 | 0.74 | 10,973 |
-            | **>30 (1)** | 0.59 | 0.35 | 0.44 | 7,109 |
-            | **<30 (2)** | 1.00 | 1.00 | 1.00 | 2,272 |
-            | **Accuracy** | | | **0.69** | **20,354** |
-            
-            </div>
-            """, unsafe_allow_html=True)
+        st.markdown("---")
         
-        st.markdown("### 📊 Confusion Matrix")
-        try:
-            bagging_img = Image.open("bagging_classifier.png")
-            st.image(bagging_img, caption="Bagging Classifier Confusion Matrix", use_container_width=True)
-        except:
-            st.warning("⚠️ Confusion matrix image not found. Please ensure 'bagging_classifier.png' exists in the same directory.")
-    
-    with tab2:
-        st.markdown("<h2 class='section-header'>🚀 Gradient Boosting Classifier</h2>", unsafe_allow_html=True)
+        # Detailed metrics
+        tabs = st.tabs([f"{MODEL_ICONS.get(b, '🤖')} {store[b].get('name', b)} Results" for b in store] + ["⚖️ Comparison"])
         
-        col1, col2 = st.columns([1, 2])
-        with col1:
-            st.markdown("""
-            <div class='info-box'>
-                <h4>Model Details</h4>
-                <ul style='line-height: 2;'>
-                    <li><strong>Algorithm:</strong> Gradient Boosting</li>
-                    <li><strong>Accuracy:</strong> 69.82% 🏆</li>
-                    <li><strong>Macro F1:</strong> 0.73</li>
-                    <li><strong>Weighted F1:</strong> 0.67</li>
-                </ul>
-            </div>
-            """, unsafe_allow_html=True)
+        for tab, (backend, metrics) in zip(tabs, store.items()):
+            with tab:
+                name = metrics.get('name', backend)
+                report = metrics['classification_report']
+                st.markdown(f"<h2 class='section-header'>{MODEL_ICONS.get(backend, '🤖')} {name}</h2>", unsafe_allow_html=True)
+                
+                col1, col2 = st.columns([1, 2])
+                with col1:
+                    trophy = " 🏆" if backend == best['backend'] else ""
+                    fit = f"<li><strong>Fit Time:</strong> {metrics['fit_seconds']:.1f}s</li>" if metrics.get('fit_seconds') else ""
+                    st.markdown(f"""
+                    <div class='info-box'>
+                        <h4>Model Details</h4>
+                        <ul style='line-height: 2;'>
+                            <li><strong>Algorithm:</strong> {name}</li>
+                            <li><strong>Accuracy:</strong> {metrics['accuracy']:.2%}{trophy}</li>
+                            <li><strong>Macro F1:</strong> {report['macro avg']['f1-score']:.2f}</li>
+                            <li><strong>Weighted F1:</strong> {report['weighted avg']['f1-score']:.2f}</li>
+                            {fit}
+                        </ul>
+                    </div>
+                    """, unsafe_allow_html=True)
+                
+                with col2:
+                    st.markdown("#### 📊 Classification Report")
+                    st.dataframe(
+                        report_table(metrics).style.format({'Precision': '{:.2f}', 'Recall': '{:.2f}',
+                                                            'F1-Score': '{:.2f}', 'Support': '{:,}'}),
+                        use_container_width=True, hide_index=True
+                    )
+                    st.caption(f"Accuracy {metrics['accuracy']:.2f} on {metrics['n_test']:,} test encounters")
+                
+                st.markdown("### 📊 Confusion Matrix")
+                st.plotly_chart(
+                    confusion_figure(name, tuple(map(tuple, metrics['confusion_matrix']))),
+                    use_container_width=True
+                )
         
-        with col2:
-            st.markdown("#### 📊 Classification Report")
-            st.markdown("""
-            <div class='stats-container'>
+        with tabs[-1]:
+            st.markdown("<h2 class='section-header'>⚖️ Model Comparison</h2>", unsafe_allow_html=True)
             
-            | Class | Precision | Recall | F1-Score | Support |
-            |-------|-----------|--------|----------|---------|
-            | **NO (0)** | 0.67 | 0.87 | 0.76 | 10,973 |
-            | **>30 (1)** | 0.62 | 0.34 | 0.44 | 7,109 |
-            | **<30 (2)** | 1.00 | 1.00 | 1.00 | 2,272 |
-            | **Accuracy** | | | **0.70** | **20,354** |
+            # Comparison chart
+            st.plotly_chart(model_comparison_figure(summary), use_container_width=True)
             
-            </div>
-            """, unsafe_allow_html=True)
-        
-        st.markdown("### 📊 Confusion Matrix")
-        try:
-            boosting_img = Image.open("gradient_boosting.png")
-            st.image(boosting_img, caption="Gradient Boosting Confusion Matrix", use_container_width=True)
-        except:
-            st.warning("⚠️ Confusion matrix image not found. Please ensure 'gradient_boosting.png' exists in the same directory.")
-    
-    with tab3:
-        st.markdown("<h2 class='section-header'>⚖️ Model Comparison</h2>", unsafe_allow_html=True)
-        
-        # Create comparison chart
-        fig = go.Figure()
-        
-        models = ['Bagging', 'Boosting']
-        accuracy = [68.68, 69.82]
-        precision = [75, 76]
-        recall = [73, 74]
-        f1 = [73, 73]
-        
-        fig.add_trace(go.Bar(
-            name='Accuracy',
-            x=models,
-            y=accuracy,
-            text=accuracy,
-            textposition='auto',
-            marker_color='#2E86AB'
-        ))
-        fig.add_trace(go.Bar(
-            name='Macro Precision',
-            x=models,
-            y=precision,
-            text=precision,
-            textposition='auto',
-            marker_color='#A23B72'
-        ))
-        fig.add_trace(go.Bar(
-            name='Macro Recall',
-            x=models,
-            y=recall,
-            text=recall,
-            textposition='auto',
-            marker_color='#F18F01'
-        ))
-        fig.add_trace(go.Bar(
-            name='Macro F1',
-            x=models,
-            y=f1,
-            text=f1,
-            textposition='auto',
-            marker_color='#06A77D'
-        ))
-        
-        fig.update_layout(
-            title=dict(
-                text="Model Performance Comparison (%)",
-                font=dict(size=20, color='#1A1A2E')
-            ),
-            xaxis_title="Model",
-            yaxis_title="Score (%)",
-            barmode='group',
-            height=450,
-            plot_bgcolor='rgba(0,0,0,0)',
-            paper_bgcolor='rgba(0,0,0,0)'
-        )
-        st.plotly_chart(fig, use_container_width=True)
-        
-        st.markdown("""
-        <div class='success-box'>
-            <h4 style='margin-top: 0;'>🏆 Winner: Gradient Boosting with 69.82% accuracy!</h4>
-            <p style='margin: 0; line-height: 1.8;'>
-                Gradient Boosting outperforms Bagging by 1.14%, showing better overall prediction capability.
-            </p>
-        </div>
-        """, unsafe_allow_html=True)
-        
-        col1, col2 = st.columns(2)
-        
-        with col1:
-            st.markdown("""
-            <div class='info-box'>
-                <h4>💡 Key Insights</h4>
-                <ul style='line-height: 2;'>
-                    <li>Both models achieve <strong>perfect precision and recall (1.00)</strong> for Class 2 (<30 days)</li>
-                    <li>Gradient Boosting shows <strong>+1.14% better accuracy</strong></li>
-                    <li>Class 1 (>30 days) is most challenging (F1: 0.44)</li>
-                    <li>Class 0 has excellent recall in Boosting (0.87)</li>
-                </ul>
-            </div>
-            """, unsafe_allow_html=True)
-        
-        with col2:
-            st.markdown("""
-            <div class='info-box'>
-                <h4>🎯 Model Strengths</h4>
-                <ul style='line-height: 2;'>
-                    <li><strong>Bagging:</strong> Better precision-recall balance for Class 0</li>
-                    <li><strong>Boosting:</strong> Superior overall accuracy and Class 0 recall</li>
-                    <li><strong>Both:</strong> Perfect performance on Class 2 (distinct patterns)</li>
-                    <li><strong>Challenge:</strong> Class 1 overlaps with Class 0 features</li>
-                </ul>
-            </div>
-            """, unsafe_allow_html=True)
+            st.markdown("### ⏱️ Training Backends")
+            try:
+                backends = get_backend_comparison()
+            except FileNotFoundError:
+                st.info("ℹ️ Run the backend comparison cell in 'data_preprocessing&model.ipynb' to benchmark the training backends.")
+            else:
+                col1, col2, col3 = st.columns(3)
+                for col, metric, title, color in [
+                    (col1, 'fit_seconds', "Fit Time (s)", '#2E86AB'),
+                    (col2, 'predict_ms_per_1k', "Predict Latency (ms / 1k rows)", '#A23B72'),
+                    (col3, 'accuracy', "Accuracy", '#06A77D'),
+                ]:
+                    with col:
+                        st.plotly_chart(backend_metric_figure(backends, metric, title, color), use_container_width=True)
+            
+            st.markdown("### 🎛️ Hyperparameter Search")
+            try:
+                tuning = get_tuning_results()
+            except FileNotFoundError:
+                st.info("ℹ️ Run `python tuning.py` to search hyperparameters with successive halving.")
+            else:
+                best_trials = tuning[tuning['best']]
+                final_round = tuning[tuning['iteration'] == tuning.groupby('backend')['iteration'].transform('max')]
+                st.dataframe(
+                    best_trials[['model', 'mean_test_score', 'std_test_score', 'n_resources', 'params']]
+                    .rename(columns={'model': 'Model', 'mean_test_score': 'CV Accuracy', 'std_test_score': 'Std',
+                                     'n_resources': 'Rows', 'params': 'Best Parameters'}),
+                    use_container_width=True, hide_index=True
+                )
+                st.caption(f"{len(tuning)} trials across {tuning['backend'].nunique()} backends; "
+                           f"{len(final_round)} candidates reached the final round.")
+            
+            if len(ranked) > 1:
+                runner_up = ranked.iloc[1]
+                st.markdown(f"""
+                <div class='success-box'>
+                    <h4 style='margin-top: 0;'>🏆 Winner: {best['model']} with {best['accuracy']:.2%} accuracy!</h4>
+                    <p style='margin: 0; line-height: 1.8;'>
+                        {best['model']} outperforms {runner_up['model']} by {best['accuracy'] - runner_up['accuracy']:.2%}, showing better overall prediction capability.
+                    </p>
+                </div>
+                """, unsafe_allow_html=True)
+            
+            best_report = store[best['backend']]['classification_report']
+            hardest = min(CLASS_LABELS, key=lambda label: best_report[label]['f1-score'])
+            col1, col2 = st.columns(2)
+            
+            with col1:
+                st.markdown(f"""
+                <div class='info-box'>
+                    <h4>💡 Key Insights</h4>
+                    <ul style='line-height: 2;'>
+                        <li><strong>{best['model']}</strong> leads with <strong>{best['accuracy']:.2%}</strong> accuracy</li>
+                        <li>Class {hardest} is most challenging (F1: {best_report[hardest]['f1-score']:.2f})</li>
+                        {''.join(f"<li>Class {label} recall: {best_report[label]['recall']:.2f}</li>" for label in CLASS_LABELS)}
+                    </ul>
+                </div>
+                """, unsafe_allow_html=True)
+            
+            with col2:
+                true_label, predicted_label, n_confused, n_true = top_confusion(store[best['backend']])
+                st.markdown(f"""
+                <div class='info-box'>
+                    <h4>🎯 Model Strengths</h4>
+                    <ul style='line-height: 2;'>
+                        {''.join(f"<li><strong>Class {row.label}:</strong> best F1 from {row.model} ({row.score:.2f})</li>" for row in class_leaders(store).itertuples())}
+                        <li><strong>Challenge:</strong> {best['model']} predicts {n_confused:,} of {n_true:,} class {true_label} encounters as {predicted_label}</li>
+                    </ul>
+                </div>
+                """, unsafe_allow_html=True)
 
 # ======================
 # 🔍 Clustering Results
@@ -727,14 +919,40 @@ elif section == "🔍 Clustering Results":
         col1, col2 = st.columns([2, 1])
         
         with col1:
+            # Filled in below, once k and the feature set have been picked
+            algorithm_details = st.empty()
+        
+        with col2:
             st.markdown("""
+            <div class='success-box'>
+                <h4 style='margin-top: 0;'>✨ Advantages</h4>
+                <ul style='line-height: 2; margin: 10px 0;'>
+                    <li>⚡ Fast computation</li>
+                    <li>📈 Scalable to large datasets</li>
+                    <li>💡 Easy to interpret</li>
+                    <li>🎯 Good for real-time systems</li>
+                </ul>
+            </div>
+            """, unsafe_allow_html=True)
+        
+        st.markdown("### 📊 Clustering Visualization")
+        col1, col2, col3 = st.columns([1, 2, 1])
+        with col1:
+            k = st.slider("Number of clusters (k)", min_value=2, max_value=10, value=3)
+        with col2:
+            feature_set = st.selectbox("Feature set", list(FEATURE_SETS))
+        with col3:
+            show_all = st.checkbox("Plot all patients", value=False, help="Otherwise a 20,000-patient sample is drawn")
+
+        algorithm_details.markdown(f"""
             <div class='info-box'>
                 <h4>Algorithm Details</h4>
                 <ul style='line-height: 2;'>
-                    <li><strong>Method:</strong> K-Means Clustering</li>
-                    <li><strong>Number of Clusters:</strong> 3 (matching target classes)</li>
+                    <li><strong>Method:</strong> Mini-batch K-Means Clustering</li>
+                    <li><strong>Number of Clusters:</strong> {k}</li>
+                    <li><strong>Features:</strong> {feature_set}</li>
                     <li><strong>Purpose:</strong> Partition patients into distinct groups</li>
-                    <li><strong>Visualization:</strong> 2D PCA projection</li>
+                    <li><strong>Visualization:</strong> 2D truncated SVD projection</li>
                 </ul>
                 
                 <h4 style='margin-top: 20px;'>How It Works</h4>
@@ -746,26 +964,29 @@ elif section == "🔍 Clustering Results":
                 </ul>
             </div>
             """, unsafe_allow_html=True)
-        
-        with col2:
-            st.markdown("""
-            <div class='success-box'>
-                <h4 style='margin-top: 0;'>✨ Advantages</h4>
-                <ul style='line-height: 2; margin: 10px 0;'>
-                    <li>⚡ Fast computation</li>
-                    <li>📈 Scalable to large datasets</li>
-                    <li>💡 Easy to interpret</li>
-                    <li>🎯 Good for real-time systems</li>
-                </ul>
-            </div>
-            """, unsafe_allow_html=True)
-        
-        st.markdown("### 📊 Clustering Visualization")
+
         try:
-            kmeans_img = Image.open("K-Means Clustering.png")
-            st.image(kmeans_img, caption="K-Means Clustering (PCA Projection)", use_container_width=True)
-        except:
-            st.warning("⚠️ K-Means clustering image not found. Please ensure 'K-Means Clustering.png' exists in the same directory.")
+            fig = kmeans_figure(k, feature_set, None if show_all else 20000)
+        except FileNotFoundError:
+            # No dataset available: fall back to the figure exported from the notebook
+            try:
+                st.image(load_asset("K-Means Clustering.png"), caption="K-Means Clustering (PCA Projection)", use_container_width=True)
+            except OSError:
+                st.warning("⚠️ K-Means clustering image not found. Please ensure 'K-Means Clustering.png' exists in the same directory.")
+        except ValueError as exc:
+            st.error(f"⚠️ Could not cluster on the '{feature_set}' features: {exc}")
+        else:
+            st.plotly_chart(fig, use_container_width=True)
+
+            labels = get_kmeans_labels(k, feature_set)
+            _, readmitted = get_clustering_matrix(feature_set)
+            summary = pd.crosstab(labels, readmitted, normalize='index').rename(columns={0: 'NO', 1: '>30', 2: '<30'})
+            summary.columns.name = None
+            summary.insert(0, 'Patients', np.bincount(labels, minlength=k))
+            summary.index = [f"Cluster {c}" for c in summary.index]
+            st.markdown("#### 🎯 Readmission Mix per Cluster")
+            st.dataframe(summary.style.format({'NO': '{:.1%}', '>30': '{:.1%}', '<30': '{:.1%}', 'Patients': '{:,}'}),
+                         use_container_width=True)
     
     with tab2:
         st.markdown("<h2 class='section-header'>🌳 Hierarchical Clustering</h2>", unsafe_allow_html=True)
@@ -807,11 +1028,38 @@ elif section == "🔍 Clustering Results":
             """, unsafe_allow_html=True)
         
         st.markdown("### 📊 Dendrogram Visualization")
+        col1, col2, col3 = st.columns([2, 1, 1])
+        with col1:
+            tree_features = st.selectbox("Feature set", list(FEATURE_SETS), key="tree_features")
+        with col2:
+            n_leaves = st.slider("Branches shown", min_value=10, max_value=60, value=30, step=5)
+        with col3:
+            n_groups = st.slider("Cut into clusters", min_value=2, max_value=10, value=3)
+
         try:
-            hierarchical_img = Image.open("Hierarchical Clustering Dendrogram.png")
-            st.image(hierarchical_img, caption="Hierarchical Clustering Dendrogram", use_container_width=True)
-        except:
-            st.warning("⚠️ Hierarchical clustering image not found. Please ensure 'Hierarchical Clustering Dendrogram.png' exists in the same directory.")
+            fig = dendrogram_figure(tree_features, n_leaves)
+        except FileNotFoundError:
+            # No dataset available: fall back to the figure exported from the notebook
+            try:
+                st.image(load_asset("Hierarchical Clustering Dendrogram.png"), caption="Hierarchical Clustering Dendrogram", use_container_width=True)
+            except OSError:
+                st.warning("⚠️ Hierarchical clustering image not found. Please ensure 'Hierarchical Clustering Dendrogram.png' exists in the same directory.")
+        except ValueError as exc:
+            st.error(f"⚠️ Could not cluster on the '{tree_features}' features: {exc}")
+        else:
+            st.plotly_chart(fig, use_container_width=True)
+            st.caption("Ward linkage over K-Means micro-clusters of every patient; leaf labels give the number of patients in each branch.")
+
+            Z, micro_labels, _ = get_hierarchy(tree_features)
+            labels = cut_tree(Z, micro_labels, n_groups)
+            _, readmitted = get_clustering_matrix(tree_features)
+            summary = pd.crosstab(labels, readmitted, normalize='index').rename(columns={0: 'NO', 1: '>30', 2: '<30'})
+            summary.columns.name = None
+            summary.insert(0, 'Patients', np.bincount(labels))
+            summary.index = [f"Cluster {c}" for c in summary.index]
+            st.markdown("#### 🎯 Readmission Mix per Cluster")
+            st.dataframe(summary.style.format({'NO': '{:.1%}', '>30': '{:.1%}', '<30': '{:.1%}', 'Patients': '{:,}'}),
+                         use_container_width=True)
     
     with tab3:
         st.markdown("<h2 class='section-header'>📊 Clustering Insights & Applications</h2>", unsafe_allow_html=True)
@@ -821,9 +1069,8 @@ elif section == "🔍 Clustering Results":
         with col1:
             st.markdown("#### 🎯 Actual Readmission Classes")
             try:
-                actual_img = Image.open("Actual Readmission Classes.png")
-                st.image(actual_img, use_container_width=True)
-            except:
+                st.image(load_asset("Actual Readmission Classes.png"), use_container_width=True)
+            except OSError:
                 st.warning("⚠️ Actual classes image not found. Please ensure 'Actual Readmission Classes.png' exists in the same directory.")
         
         with col2:
@@ -929,6 +1176,84 @@ elif section == "🔍 Clustering Results":
             </div>
             """, unsafe_allow_html=True)
 
+# ======================
+# 🔮 Predict
+# ======================
+elif section == "🔮 Predict":
+    st.markdown("<h1 class='main-header'>🔮 Readmission Prediction</h1>", unsafe_allow_html=True)
+
+    st.markdown("""
+    <div class='highlight-box'>
+        <h3 style='margin-top: 0;'>🎯 Batch Scoring</h3>
+        <p style='font-size: 1.1rem; line-height: 1.8; margin: 0;'>
+            Upload a CSV of encounters in the <code>diabetic_data.csv</code> format to score every row
+            with the Gradient Boosting pipeline in a single vectorized pass.
+        </p>
+    </div>
+    """, unsafe_allow_html=True)
+
+    try:
+        pipeline = get_pipeline()
+    except FileNotFoundError:
+        pipeline = None
+        st.warning(f"⚠️ Trained model not found. Run the boosting cells in 'data_preprocessing&model.ipynb' to create '{MODEL_PATH}'.")
+
+    uploaded = st.file_uploader("📤 Upload encounters (CSV)", type=["csv"])
+
+    if pipeline is not None and uploaded is not None:
+        # Codes stay strings ('414', '250.01'), as in the training data
+        encounters = pd.read_csv(uploaded, dtype={c: str for c in CATEGORY_COLS})
+
+        try:
+            start = time.perf_counter()
+            scores = predict_batch(encounters, pipeline)
+            elapsed = time.perf_counter() - start
+        except ValueError as exc:
+            st.error(f"❌ {exc}")
+        else:
+            col1, col2, col3 = st.columns(3)
+            with col1:
+                st.metric("📊 Encounters Scored", f"{len(scores):,}")
+            with col2:
+                st.metric("⏱️ Scoring Time", f"{elapsed * 1000:,.0f} ms")
+            with col3:
+                st.metric("🚨 Predicted <30", f"{(scores['label'] == '<30').mean():.1%}")
+
+            counts = scores['label'].value_counts().reindex(['NO', '>30', '<30'], fill_value=0)
+            fig = go.Figure(data=[
+                go.Bar(
+                    x=counts.index.tolist(),
+                    y=counts.values.tolist(),
+                    marker=dict(
+                        color=['#2E86AB', '#A23B72', '#F18F01'],
+                        line=dict(color='white', width=2)
+                    ),
+                    text=counts.values.tolist(),
+                    textposition='auto'
+                )
+            ])
+            fig.update_layout(
+                title=dict(
+                    text="Predicted Readmission Classes",
+                    font=dict(size=20, color='#1A1A2E')
+                ),
+                xaxis_title="Readmission Class",
+                yaxis_title="Number of Encounters",
+                height=400,
+                plot_bgcolor='rgba(0,0,0,0)',
+                paper_bgcolor='rgba(0,0,0,0)'
+            )
+            st.plotly_chart(fig, use_container_width=True)
+
+            st.markdown("### 📋 Scored Encounters")
+            st.dataframe(pd.concat([scores, encounters], axis=1).head(1000), use_container_width=True)
+            st.download_button(
+                "⬇️ Download predictions",
+                scores.to_csv(index=False).encode('utf-8'),
+                file_name="readmission_predictions.csv",
+                mime="text/csv"
+            )
+
 # Footer
 st.markdown("---")
 st.markdown("""
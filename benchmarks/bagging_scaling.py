@@ -0,0 +1,61 @@
+"""Scaling of BaggingClassifier fit and predict across worker processes.
+
+Run from the project root:
+
+    python -m benchmarks.bagging_scaling --workers 1 2 4 8
+
+Uses the full dataset from ``data.load_data`` and the cached design matrix,
+so only the ensemble itself is timed. Results go to
+``benchmarks/results/bagging_scaling.csv``.
+"""
+import argparse
+import os
+import time
+
+import pandas as pd
+from joblib import parallel_config
+
+from data import load_data
+from features import cached_transform, get_preprocessor
+from models import build_estimator
+from splits import patient_train_test_split
+
+RESULTS_PATH = os.path.join("benchmarks", "results", "bagging_scaling.csv")
+
+
+def run(workers=(1, 2, 4, 8), path=RESULTS_PATH):
+    X_train, X_test, y_train, y_test = patient_train_test_split(load_data())
+    preprocessor = get_preprocessor(X_train)
+    X_train_t = cached_transform(preprocessor, X_train)
+    X_test_t = cached_transform(preprocessor, X_test)
+
+    rows = []
+    for n_jobs in workers:
+        model = build_estimator('bagging', n_jobs=n_jobs)
+        with parallel_config(backend='loky'):
+            start = time.perf_counter()
+            model.fit(X_train_t, y_train)
+            fit_seconds = time.perf_counter() - start
+
+            start = time.perf_counter()
+            model.predict_proba(X_test_t)
+            predict_seconds = time.perf_counter() - start
+
+        rows.append({'n_jobs': n_jobs, 'fit_seconds': fit_seconds, 'predict_seconds': predict_seconds})
+        print(f"n_jobs={n_jobs}: fit {fit_seconds:.2f}s, predict_proba {predict_seconds:.2f}s")
+
+    results = pd.DataFrame(rows)
+    results['fit_speedup'] = results['fit_seconds'].iloc[0] / results['fit_seconds']
+    results['predict_speedup'] = results['predict_seconds'].iloc[0] / results['predict_seconds']
+
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    results.to_csv(path, index=False)
+    return results
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--workers', type=int, nargs='+', default=[1, 2, 4, 8])
+    parser.add_argument('--output', default=RESULTS_PATH)
+    args = parser.parse_args()
+    print(run(args.workers, args.output).to_string(index=False))
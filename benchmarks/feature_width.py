@@ -0,0 +1,73 @@
+"""One-hot matrix width, memory and training time per preprocessing kind.
+
+Run from the project root:
+
+    python -m benchmarks.feature_width --kinds onehot grouped
+
+Compares the full one-hot encoding of ``diag_1..3`` / ``medical_specialty``
+against ICD-9 chapter grouping with rare-level collapsing. Results go to
+``benchmarks/results/feature_width.csv``.
+"""
+import argparse
+import os
+import time
+
+import pandas as pd
+from sklearn.metrics import accuracy_score
+
+from data import load_data
+from features import PREPROCESSORS, categorical_columns
+from models import build_estimator
+from splits import patient_train_test_split
+
+RESULTS_PATH = os.path.join("benchmarks", "results", "feature_width.csv")
+
+
+def matrix_nbytes(X):
+    """Bytes held by a dense array or a CSR matrix's data and index arrays."""
+    if hasattr(X, 'indptr'):
+        return X.data.nbytes + X.indices.nbytes + X.indptr.nbytes
+    return X.nbytes
+
+
+def run(kinds=('onehot', 'grouped'), backend='boosting', path=RESULTS_PATH):
+    X_train, X_test, y_train, y_test = patient_train_test_split(load_data())
+
+    rows = []
+    for kind in kinds:
+        preprocessor = PREPROCESSORS[kind](categorical_columns(X_train))
+
+        start = time.perf_counter()
+        X_train_t = preprocessor.fit_transform(X_train)
+        preprocess_seconds = time.perf_counter() - start
+
+        model = build_estimator(backend)
+        start = time.perf_counter()
+        model.fit(X_train_t, y_train)
+        fit_seconds = time.perf_counter() - start
+
+        accuracy = accuracy_score(y_test, model.predict(preprocessor.transform(X_test)))
+        rows.append({
+            'preprocessing': kind,
+            'n_features': X_train_t.shape[1],
+            'matrix_mb': matrix_nbytes(X_train_t) / 1e6,
+            'preprocess_seconds': preprocess_seconds,
+            f'{backend}_fit_seconds': fit_seconds,
+            'accuracy': accuracy,
+        })
+        print(f"{kind}: {X_train_t.shape[1]:,} columns, {rows[-1]['matrix_mb']:.1f} MB, "
+              f"fit {fit_seconds:.1f}s, accuracy {accuracy:.4f}")
+
+    results = pd.DataFrame(rows)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    results.to_csv(path, index=False)
+    return results
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--kinds', nargs='+', default=['onehot', 'grouped'], choices=list(PREPROCESSORS))
+    parser.add_argument('--backend', default='boosting', choices=['bagging', 'boosting'])
+    parser.add_argument('--output', default=RESULTS_PATH)
+    args = parser.parse_args()
+    print(run(args.kinds, args.backend, args.output).to_string(index=False))
@@ -0,0 +1,76 @@
+"""Single-encounter latency: sklearn Pipeline vs the exported ONNX runtime.
+
+Run from the project root after ``python export.py``:
+
+    python -m benchmarks.latency --requests 2000
+
+Each request scores one encounter, drawn in turn from the dataset, through
+``Pipeline.predict_proba`` on a one-row DataFrame, through ``OnnxScorer`` on
+the same one-row DataFrame and through ``OnnxScorer`` on a plain dict (the
+shape an EHR integration would send). Latency percentiles go to
+``benchmarks/results/latency.csv``.
+"""
+import argparse
+import os
+import time
+
+import numpy as np
+import pandas as pd
+
+from data import load_data
+from export import ONNX_PATH, OnnxScorer
+from features import split_features
+from predict import MODEL_PATH, load_pipeline
+
+RESULTS_PATH = os.path.join("benchmarks", "results", "latency.csv")
+
+PERCENTILES = (50, 95, 99)
+
+
+def time_calls(fn, inputs, warmup=50):
+    for item in inputs[:warmup]:
+        fn(item)
+    latencies = np.empty(len(inputs))
+    for i, item in enumerate(inputs):
+        start = time.perf_counter()
+        fn(item)
+        latencies[i] = time.perf_counter() - start
+    return latencies * 1000
+
+
+def run(model_path=MODEL_PATH, onnx_path=ONNX_PATH, n_requests=2000, path=RESULTS_PATH):
+    df = load_data().head(n_requests)
+    frames = [df.iloc[[i]] for i in range(len(df))]
+    records = df.to_dict('records')
+
+    pipeline = load_pipeline(model_path)
+    scorer = OnnxScorer(onnx_path)
+    runtimes = {
+        'sklearn_pipeline': (lambda frame: pipeline.predict_proba(split_features(frame)[0]), frames),
+        'onnx_frame': (scorer.predict_proba, frames),
+        'onnx_dict': (scorer.predict_proba, records),
+    }
+
+    rows = []
+    for runtime, (fn, inputs) in runtimes.items():
+        latencies = time_calls(fn, inputs)
+        row = {'runtime': runtime, 'requests': len(inputs), 'mean_ms': latencies.mean()}
+        row.update({f"p{q}_ms": np.percentile(latencies, q) for q in PERCENTILES})
+        rows.append(row)
+
+    results = pd.DataFrame(rows)
+    results['speedup_p50'] = results['p50_ms'].iloc[0] / results['p50_ms']
+
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    results.to_csv(path, index=False)
+    return results
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--model', default=MODEL_PATH)
+    parser.add_argument('--onnx', default=ONNX_PATH)
+    parser.add_argument('--requests', type=int, default=2000)
+    parser.add_argument('--output', default=RESULTS_PATH)
+    args = parser.parse_args()
+    print(run(args.model, args.onnx, args.requests, args.output).to_string(index=False, float_format='{:.3f}'.format))
@@ -0,0 +1,146 @@
+"""Local load generator for the micro-batching scoring service.
+
+Run from the project root, against a running ``python service.py``:
+
+    python -m benchmarks.load_test --concurrency 1 8 32 128 --requests 2000
+
+or let it start (and stop) the service itself with ``--spawn``. Each client
+keeps one HTTP/1.1 connection open and posts single encounters back to back.
+Per concurrency level it records throughput, client-side latency
+percentiles and the mean batch size reported by ``/metrics``. Results go to
+``benchmarks/results/load_test.csv``.
+"""
+import argparse
+import asyncio
+import json
+import os
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+from data import load_data
+
+RESULTS_PATH = os.path.join("benchmarks", "results", "load_test.csv")
+
+
+async def request(reader, writer, method, path, body=b''):
+    writer.write(f"{method} {path} HTTP/1.1\r\nHost: localhost\r\nContent-Type: application/json\r\n"
+                 f"Content-Length: {len(body)}\r\n\r\n".encode() + body)
+    await writer.drain()
+    status = int((await reader.readline()).split()[1])
+    length = 0
+    while (line := await reader.readline()) not in (b'\r\n', b''):
+        name, _, value = line.decode('latin-1').partition(':')
+        if name.lower() == 'content-length':
+            length = int(value)
+    return status, json.loads(await reader.readexactly(length))
+
+
+async def get(host, port, path):
+    reader, writer = await asyncio.open_connection(host, port)
+    try:
+        return (await request(reader, writer, 'GET', path))[1]
+    finally:
+        writer.close()
+
+
+async def client(host, port, bodies, latencies, errors):
+    reader, writer = await asyncio.open_connection(host, port)
+    try:
+        for body in bodies:
+            start = time.perf_counter()
+            status, _ = await request(reader, writer, 'POST', '/predict', body)
+            latencies.append(time.perf_counter() - start)
+            if status != 200:
+                errors.append(status)
+    finally:
+        writer.close()
+
+
+async def load_level(host, port, bodies, concurrency):
+    before = await get(host, port, '/metrics')
+    latencies, errors = [], []
+    start = time.perf_counter()
+    await asyncio.gather(*[
+        client(host, port, bodies[i::concurrency], latencies, errors) for i in range(concurrency)
+    ])
+    elapsed = time.perf_counter() - start
+    after = await get(host, port, '/metrics')
+
+    latencies = np.asarray(latencies) * 1000
+    batches = after['batches'] - before['batches']
+    return {
+        'concurrency': concurrency,
+        'requests': len(latencies),
+        'errors': len(errors),
+        'requests_per_second': len(latencies) / elapsed,
+        'p50_ms': np.percentile(latencies, 50),
+        'p95_ms': np.percentile(latencies, 95),
+        'p99_ms': np.percentile(latencies, 99),
+        'mean_batch_size': (after['encounters'] - before['encounters']) / batches if batches else 0.0,
+    }
+
+
+async def wait_until_up(host, port, timeout=120):
+    deadline = time.monotonic() + timeout
+    while True:
+        try:
+            return await get(host, port, '/health')
+        except OSError:
+            if time.monotonic() > deadline:
+                raise
+            await asyncio.sleep(0.5)
+
+
+async def run_async(host, port, concurrency, n_requests, spawn, service_args):
+    records = json.loads(load_data().head(n_requests).to_json(orient='records'))
+    bodies = [json.dumps(record).encode() for record in records]
+
+    process = None
+    if spawn:
+        process = await asyncio.create_subprocess_exec(
+            sys.executable, 'service.py', '--host', host, '--port', str(port), *service_args
+        )
+    try:
+        await wait_until_up(host, port)
+        rows = []
+        for level in concurrency:
+            rows.append(await load_level(host, port, bodies, level))
+            print(f"concurrency {level}: {rows[-1]['requests_per_second']:,.0f} req/s, "
+                  f"p99 {rows[-1]['p99_ms']:.1f} ms, mean batch {rows[-1]['mean_batch_size']:.1f}")
+        return rows
+    finally:
+        if process is not None:
+            process.terminate()
+            await process.wait()
+
+
+def run(host='127.0.0.1', port=8000, concurrency=(1, 8, 32, 128), n_requests=2000, spawn=False,
+        service_args=(), path=RESULTS_PATH):
+    results = pd.DataFrame(asyncio.run(run_async(host, port, concurrency, n_requests, spawn, list(service_args))))
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    results.to_csv(path, index=False)
+    return results
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8000)
+    parser.add_argument('--concurrency', type=int, nargs='+', default=[1, 8, 32, 128])
+    parser.add_argument('--requests', type=int, default=2000, help="requests per concurrency level")
+    parser.add_argument('--spawn', action='store_true', help="start service.py for the duration of the test")
+    parser.add_argument('--max-batch', type=int, default=None, help="passed to the spawned service")
+    parser.add_argument('--max-wait-ms', type=float, default=None, help="passed to the spawned service")
+    parser.add_argument('--output', default=RESULTS_PATH)
+    args = parser.parse_args()
+
+    service_args = []
+    if args.max_batch is not None:
+        service_args += ['--max-batch', str(args.max_batch)]
+    if args.max_wait_ms is not None:
+        service_args += ['--max-wait-ms', str(args.max_wait_ms)]
+    print(run(args.host, args.port, args.concurrency, args.requests, args.spawn, service_args,
+              args.output).to_string(index=False, float_format='{:.2f}'.format))
@@ -0,0 +1,86 @@
+"""Peak RSS of the load -> preprocess -> fit path under two dtype plans.
+
+Run from the project root:
+
+    python -m benchmarks.memory_profile --backend boosting
+
+``float64`` reproduces the original notebooks (``pd.read_csv`` with inferred
+int64/object columns, float64 encoders); ``float32`` is the current plan
+(typed Parquet cache with category/int8 columns, float32 encoders). Each plan
+runs in a fresh process so the peaks are independent. Results go to
+``benchmarks/results/memory_profile.csv``.
+"""
+import argparse
+import multiprocessing as mp
+import os
+import resource
+import time
+
+import numpy as np
+import pandas as pd
+
+RESULTS_PATH = os.path.join("benchmarks", "results", "memory_profile.csv")
+
+PLANS = ('float64', 'float32')
+
+
+def peak_rss_mb():
+    # ru_maxrss is reported in kilobytes on Linux
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def profile_plan(plan, backend, params, queue):
+    from data import RAW_PATH, load_data
+    from features import build_preprocessor, categorical_columns, split_features
+    from models import build_estimator
+
+    stages = {'plan': plan, 'baseline_mb': peak_rss_mb()}
+
+    start = time.perf_counter()
+    df = pd.read_csv(RAW_PATH) if plan == 'float64' else load_data()
+    X, y = split_features(df)
+    stages['load_seconds'] = time.perf_counter() - start
+    stages['frame_mb'] = X.memory_usage(deep=True).sum() / 1e6
+    stages['load_peak_mb'] = peak_rss_mb()
+
+    start = time.perf_counter()
+    dtype = np.float64 if plan == 'float64' else np.float32
+    Xt = build_preprocessor(categorical_columns(X), dtype=dtype).fit_transform(X)
+    stages['preprocess_seconds'] = time.perf_counter() - start
+    stages['matrix_mb'] = (Xt.data.nbytes + Xt.indices.nbytes + Xt.indptr.nbytes) / 1e6
+    stages['preprocess_peak_mb'] = peak_rss_mb()
+
+    start = time.perf_counter()
+    build_estimator(backend, **params).fit(Xt, y)
+    stages['fit_seconds'] = time.perf_counter() - start
+    stages['fit_peak_mb'] = peak_rss_mb()
+
+    queue.put(stages)
+
+
+def run(backend='boosting', params=None, path=RESULTS_PATH):
+    ctx = mp.get_context('spawn')
+    rows = []
+    for plan in PLANS:
+        queue = ctx.Queue()
+        process = ctx.Process(target=profile_plan, args=(plan, backend, params or {}, queue))
+        process.start()
+        rows.append(queue.get())
+        process.join()
+        print(f"{plan}: load peak {rows[-1]['load_peak_mb']:.0f} MB, "
+              f"preprocess peak {rows[-1]['preprocess_peak_mb']:.0f} MB, fit peak {rows[-1]['fit_peak_mb']:.0f} MB")
+
+    results = pd.DataFrame(rows)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    results.to_csv(path, index=False)
+    return results
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--backend', default='boosting', choices=['bagging', 'boosting'])
+    parser.add_argument('--n-estimators', type=int, default=None, help="override the backend's tree count")
+    parser.add_argument('--output', default=RESULTS_PATH)
+    args = parser.parse_args()
+    params = {'n_estimators': args.n_estimators} if args.n_estimators else {}
+    print(run(args.backend, params, args.output).T.to_string(header=False))
@@ -0,0 +1,105 @@
+"""Peak RSS vs dataset size: in-memory training against the out-of-core mode.
+
+Run from the project root:
+
+    python -m benchmarks.outofcore_memory --sizes 100000 300000 1000000 3000000
+
+For every size a synthetic Parquet file is written with ``synthetic.write``.
+``in_memory`` loads it whole, fits the one-hot preprocessor on the full
+frame and fits ``SGDClassifier`` on the full matrix; ``out_of_core`` runs
+``outofcore.train_out_of_core`` on the same file. Both use the same
+patient-hash split and epochs, and each run happens in a fresh process so
+the peaks are independent. A run that dies (e.g. out of memory) is recorded
+without numbers. Results go to ``benchmarks/results/outofcore_memory.csv``.
+"""
+import argparse
+import multiprocessing as mp
+import os
+import resource
+import tempfile
+import time
+
+import pandas as pd
+
+RESULTS_PATH = os.path.join("benchmarks", "results", "outofcore_memory.csv")
+
+MODES = ('in_memory', 'out_of_core')
+
+
+def peak_rss_mb():
+    # VmHWM starts afresh in the spawned process; ru_maxrss keeps the parent's peak across exec
+    try:
+        with open('/proc/self/status') as fh:
+            for line in fh:
+                if line.startswith('VmHWM:'):
+                    return int(line.split()[1]) / 1024
+    except OSError:
+        pass
+    # ru_maxrss is reported in kilobytes on Linux
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def profile_mode(mode, path, chunk_rows, epochs, queue):
+    from sklearn.linear_model import SGDClassifier
+
+    from features import build_preprocessor, categorical_columns, split_features
+    from outofcore import SGD_PARAMS, evaluate_out_of_core, test_patients, train_out_of_core
+
+    baseline = peak_rss_mb()
+    start = time.perf_counter()
+    if mode == 'in_memory':
+        df = pd.read_parquet(path)
+        test = test_patients(df)
+        X_train, y_train = split_features(df[~test])
+        X_test, y_test = split_features(df[test])
+        del df
+        preprocessor = build_preprocessor(categorical_columns(X_train)).fit(X_train)
+        model = SGDClassifier(max_iter=epochs, tol=None, **SGD_PARAMS).fit(preprocessor.transform(X_train), y_train)
+        fit_seconds = time.perf_counter() - start
+        accuracy = model.score(preprocessor.transform(X_test), y_test)
+    else:
+        pipeline = train_out_of_core(path, chunk_rows, epochs)
+        fit_seconds = time.perf_counter() - start
+        accuracy = evaluate_out_of_core(pipeline, path, chunk_rows)['accuracy']
+
+    queue.put({'baseline_mb': baseline, 'peak_mb': peak_rss_mb(), 'fit_seconds': fit_seconds, 'accuracy': accuracy})
+
+
+def run(sizes=(100_000, 300_000, 1_000_000), modes=MODES, chunk_rows=100_000, epochs=3, path=RESULTS_PATH):
+    from synthetic import write
+
+    ctx = mp.get_context('spawn')
+    rows = []
+    with tempfile.TemporaryDirectory() as workdir:
+        for size in sizes:
+            data_path = write(os.path.join(workdir, f"encounters-{size}.parquet"), size)
+            file_mb = os.path.getsize(data_path) / 1e6
+            for mode in modes:
+                queue = ctx.Queue()
+                process = ctx.Process(target=profile_mode, args=(mode, data_path, chunk_rows, epochs, queue))
+                process.start()
+                process.join()
+                result = queue.get() if process.exitcode == 0 else {}
+                rows.append({'rows': size, 'mode': mode, 'file_mb': file_mb, **result})
+                if result:
+                    print(f"{size:,} rows, {mode}: peak {result['peak_mb']:,.0f} MB, "
+                          f"fit {result['fit_seconds']:.1f}s, accuracy {result['accuracy']:.4f}")
+                else:
+                    print(f"{size:,} rows, {mode}: failed (exit code {process.exitcode})")
+            os.remove(data_path)
+
+    results = pd.DataFrame(rows)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    results.to_csv(path, index=False)
+    return results
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--sizes', type=int, nargs='+', default=[100_000, 300_000, 1_000_000])
+    parser.add_argument('--modes', nargs='+', default=list(MODES), choices=list(MODES))
+    parser.add_argument('--chunk-rows', type=int, default=100_000)
+    parser.add_argument('--epochs', type=int, default=3)
+    parser.add_argument('--output', default=RESULTS_PATH)
+    args = parser.parse_args()
+    print(run(args.sizes, args.modes, args.chunk_rows, args.epochs, args.output).to_string(index=False))
@@ -0,0 +1,70 @@
+"""Runtime, peak memory and explained variance of the 2-D projection.
+
+Run from the project root:
+
+    python -m benchmarks.reduction
+
+Compares the notebook's ``PCA(n_components=2)`` with randomized
+``TruncatedSVD`` on the sparse preprocessed matrix. Peak memory is measured
+with tracemalloc (NumPy/SciPy allocations included). Results go to
+``benchmarks/results/reduction.csv``.
+"""
+import argparse
+import os
+import time
+import tracemalloc
+
+import pandas as pd
+from sklearn.decomposition import PCA
+
+from clustering import clustering_matrix, fit_reduction
+
+RESULTS_PATH = os.path.join("benchmarks", "results", "reduction.csv")
+
+METHODS = {
+    'pca': lambda Xt: PCA(n_components=2, random_state=42).fit(Xt),
+    'truncated_svd': lambda Xt: fit_reduction(Xt, n_components=2),
+}
+
+
+def run(methods=tuple(METHODS), path=RESULTS_PATH):
+    Xt, _ = clustering_matrix()
+
+    rows = []
+    for method in methods:
+        tracemalloc.start()
+        start = time.perf_counter()
+        try:
+            model = METHODS[method](Xt)
+            model.transform(Xt)
+        except TypeError as exc:
+            # scikit-learn < 1.4 rejects sparse input to PCA
+            tracemalloc.stop()
+            print(f"{method}: failed ({exc})")
+            rows.append({'method': method, 'seconds': None, 'peak_mb': None, 'explained_variance_ratio': None})
+            continue
+        seconds = time.perf_counter() - start
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+
+        rows.append({
+            'method': method,
+            'seconds': seconds,
+            'peak_mb': peak / 1e6,
+            'explained_variance_ratio': model.explained_variance_ratio_.sum(),
+        })
+        print(f"{method}: {seconds:.2f}s, peak {peak / 1e6:.1f} MB, "
+              f"explained variance {rows[-1]['explained_variance_ratio']:.4f}")
+
+    results = pd.DataFrame(rows)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    results.to_csv(path, index=False)
+    return results
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--methods', nargs='+', default=list(METHODS), choices=list(METHODS))
+    parser.add_argument('--output', default=RESULTS_PATH)
+    args = parser.parse_args()
+    print(run(args.methods, args.output).to_string(index=False))
@@ -0,0 +1,96 @@
+"""Cold vs warm startup time of a serving process loading a registered model.
+
+Run from the project root:
+
+    python -m benchmarks.startup --name boosting --repeats 5
+
+Every trial is a fresh process that imports the prediction stack, loads the
+pipeline (fully copied or with ``mmap_mode='r'``) and scores one encounter.
+Before a "cold" trial the artifact is evicted from the page cache with
+``posix_fadvise(DONTNEED)``; "warm" trials follow a load that left it
+cached. Results go to ``benchmarks/results/startup.csv``.
+"""
+import argparse
+import multiprocessing as mp
+import os
+import resource
+import time
+
+import pandas as pd
+
+RESULTS_PATH = os.path.join("benchmarks", "results", "startup.csv")
+
+MODES = {'copy': None, 'mmap': 'r'}
+
+
+def evict(path):
+    """Drop ``path`` from the page cache (best effort; Linux only)."""
+    fd = os.open(path, os.O_RDONLY)
+    try:
+        os.fsync(fd)
+        os.posix_fadvise(fd, 0, 0, os.POSIX_FADV_DONTNEED)
+    finally:
+        os.close(fd)
+
+
+def startup(path, mmap_mode, queue):
+    start = time.perf_counter()
+    import joblib
+    from data import load_data
+    from predict import predict_batch
+    import_seconds = time.perf_counter() - start
+
+    start = time.perf_counter()
+    pipeline = joblib.load(path, mmap_mode=mmap_mode)
+    load_seconds = time.perf_counter() - start
+
+    encounter = load_data().head(1)
+    start = time.perf_counter()
+    predict_batch(encounter, pipeline)
+    first_predict_seconds = time.perf_counter() - start
+
+    queue.put({
+        'import_seconds': import_seconds,
+        'load_seconds': load_seconds,
+        'first_predict_seconds': first_predict_seconds,
+        # ru_maxrss is reported in kilobytes on Linux
+        'peak_rss_mb': resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024,
+    })
+
+
+def run(path, repeats=5, out=RESULTS_PATH):
+    ctx = mp.get_context('spawn')
+    rows = []
+    for mode, mmap_mode in MODES.items():
+        for cache in ('cold', 'warm'):
+            for trial in range(repeats):
+                if cache == 'cold':
+                    evict(path)
+                queue = ctx.Queue()
+                process = ctx.Process(target=startup, args=(path, mmap_mode, queue))
+                process.start()
+                rows.append({'mode': mode, 'cache': cache, 'trial': trial, **queue.get()})
+                process.join()
+
+    results = pd.DataFrame(rows)
+    summary = results.groupby(['mode', 'cache'], sort=False).median(numeric_only=True).drop(columns='trial')
+    print(summary.to_string(float_format='{:.3f}'.format))
+
+    os.makedirs(os.path.dirname(out), exist_ok=True)
+    results.to_csv(out, index=False)
+    return results
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--name', default='boosting', help="registered model name")
+    parser.add_argument('--version', type=int, default=None, help="registered version (default: latest)")
+    parser.add_argument('--path', default=None, help="pipeline file to load instead of a registry entry")
+    parser.add_argument('--repeats', type=int, default=5)
+    parser.add_argument('--output', default=RESULTS_PATH)
+    args = parser.parse_args()
+
+    if args.path is None:
+        from registry import PIPELINE_FILE, version_dir
+        args.path = os.path.join(version_dir(args.name, args.version), PIPELINE_FILE)
+    run(args.path, args.repeats, args.output)
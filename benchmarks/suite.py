@@ -0,0 +1,297 @@
+"""Regression benchmarks for the load -> preprocess -> train -> predict path.
+
+Run from the project root; no ``diabetic_data.csv`` needed, every case runs
+on encounters from ``synthetic.generate``:
+
+    python -m benchmarks.suite                       # all cases, 20,000 training rows
+    python -m benchmarks.suite --only predict_1 predict_100 --rows 50000
+    python -m benchmarks.suite --compare             # against the previous run
+
+Each case is timed ``timeit``-style: the loop count is calibrated so one
+measurement takes at least 0.2 s, then ``--repeats`` measurements are taken
+and per-call min / median / mean are recorded. A run is stored as
+``benchmarks/results/suite/<timestamp>-<commit>.json`` together with the
+commit, library versions and data size. ``--compare`` reports the median
+ratio of every case against a stored run and exits non-zero when one is
+slower by more than ``--threshold``.
+"""
+import argparse
+import glob
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+import timeit
+
+import numpy as np
+import pandas as pd
+import sklearn
+from sklearn.decomposition import PCA
+from sklearn.pipeline import Pipeline
+
+from clustering import minibatch_kmeans
+from data import build_cache, read_raw
+from features import build_preprocessor, categorical_columns, split_features
+from models import build_estimator
+from synthetic import generate, write
+
+RESULTS_DIR = os.path.join("benchmarks", "results", "suite")
+
+PREDICT_SIZES = {'predict_1': 1, 'predict_100': 100, 'predict_10k': 10_000, 'predict_100k': 100_000}
+
+
+# ======================
+# Fixtures
+# ======================
+class Context:
+    """Synthetic data, files and fitted objects shared by the cases, built lazily."""
+
+    def __init__(self, rows, seed, directory):
+        self.rows = rows
+        self.seed = seed
+        self.directory = directory
+        self._cache = {}
+
+    def _get(self, name, build):
+        if name not in self._cache:
+            self._cache[name] = build()
+        return self._cache[name]
+
+    @property
+    def csv_path(self):
+        def build():
+            return write(os.path.join(self.directory, 'diabetic_data.csv'), self.rows, seed=self.seed)
+        return self._get('csv_path', build)
+
+    @property
+    def parquet_path(self):
+        return self._get('parquet_path', lambda: build_cache(self.csv_path, self.directory))
+
+    @property
+    def frame(self):
+        return self._get('frame', lambda: pd.read_parquet(self.parquet_path))
+
+    @property
+    def Xy(self):
+        return self._get('Xy', lambda: split_features(self.frame))
+
+    @property
+    def preprocessor(self):
+        X, _ = self.Xy
+        return self._get('preprocessor', lambda: build_preprocessor(categorical_columns(X)).fit(X))
+
+    @property
+    def Xt(self):
+        return self._get('Xt', lambda: self.preprocessor.transform(self.Xy[0]))
+
+    @property
+    def pipeline(self):
+        def build():
+            estimator = build_estimator('boosting').fit(self.Xt, self.Xy[1])
+            return Pipeline([('preprocess', self.preprocessor), ('boosting', estimator)])
+        return self._get('pipeline', build)
+
+    @property
+    def scoring_frame(self):
+        # Unseen encounters, as many as the largest predict case
+        def build():
+            X, _ = split_features(generate(max(PREDICT_SIZES.values()), self.seed + 1))
+            return X
+        return self._get('scoring_frame', build)
+
+
+# ======================
+# Cases
+# ======================
+def load_csv(ctx):
+    path = ctx.csv_path
+    return lambda: read_raw(path)
+
+
+def load_parquet(ctx):
+    path = ctx.parquet_path
+    return lambda: pd.read_parquet(path)
+
+
+def preprocess_fit_transform(ctx):
+    X, _ = ctx.Xy
+    categorical_cols = categorical_columns(X)
+    return lambda: build_preprocessor(categorical_cols).fit_transform(X)
+
+
+def fit_bagging(ctx):
+    Xt, y = ctx.Xt, ctx.Xy[1]
+    return lambda: build_estimator('bagging').fit(Xt, y)
+
+
+def fit_boosting(ctx):
+    Xt, y = ctx.Xt, ctx.Xy[1]
+    return lambda: build_estimator('boosting').fit(Xt, y)
+
+
+def predict_rows(n_rows):
+    def case(ctx):
+        pipeline, X = ctx.pipeline, ctx.scoring_frame.iloc[:n_rows]
+        return lambda: pipeline.predict_proba(X)
+    return case
+
+
+def kmeans(ctx):
+    Xt = ctx.Xt
+    return lambda: minibatch_kmeans(Xt, 3)
+
+
+def pca(ctx):
+    # Sparse input needs scikit-learn >= 1.4
+    Xt = ctx.Xt
+    return lambda: PCA(n_components=2, random_state=42).fit_transform(Xt)
+
+
+CASES = {
+    'load_csv': load_csv,
+    'load_parquet': load_parquet,
+    'preprocess_fit_transform': preprocess_fit_transform,
+    'fit_bagging': fit_bagging,
+    'fit_boosting': fit_boosting,
+    **{name: predict_rows(n_rows) for name, n_rows in PREDICT_SIZES.items()},
+    'kmeans': kmeans,
+    'pca': pca,
+}
+
+
+# ======================
+# Timing
+# ======================
+def time_case(fn, repeats):
+    """Per-call seconds for ``repeats`` measurements of an auto-ranged loop."""
+    timer = timeit.Timer(fn)
+    number, _ = timer.autorange()
+    times = [t / number for t in timer.repeat(repeat=repeats, number=number)]
+    return {
+        'number': number,
+        'repeats': repeats,
+        'min': min(times),
+        'median': statistics.median(times),
+        'mean': statistics.fmean(times),
+        'stdev': statistics.stdev(times) if len(times) > 1 else 0.0,
+    }
+
+
+def git_commit():
+    try:
+        commit = subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], capture_output=True, text=True,
+                                check=True).stdout.strip()
+        dirty = subprocess.run(['git', 'status', '--porcelain', '--untracked-files=no'],
+                               capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return 'unknown'
+    return commit + ('-dirty' if dirty else '')
+
+
+def environment(rows, seed):
+    return {
+        'timestamp': time.strftime('%Y-%m-%dT%H:%M:%S'),
+        'commit': git_commit(),
+        'rows': rows,
+        'seed': seed,
+        'python': platform.python_version(),
+        'numpy': np.__version__,
+        'pandas': pd.__version__,
+        'scikit-learn': sklearn.__version__,
+        'machine': platform.machine(),
+        'cpu_count': os.cpu_count(),
+    }
+
+
+# ======================
+# Stored runs
+# ======================
+def stored_runs(directory=RESULTS_DIR):
+    """Stored run files, oldest first."""
+    return sorted(glob.glob(os.path.join(directory, '*.json')))
+
+
+def save_run(run, directory=RESULTS_DIR):
+    meta = run['environment']
+    stamp = meta['timestamp'].replace('-', '').replace(':', '').replace('T', '-')
+    path = os.path.join(directory, f"{stamp}-{meta['commit']}.json")
+    os.makedirs(directory, exist_ok=True)
+    with open(path + '.tmp', 'w') as fh:
+        json.dump(run, fh, indent=1)
+    os.replace(path + '.tmp', path)
+    return path
+
+
+def load_run(path):
+    with open(path) as fh:
+        return json.load(fh)
+
+
+def compare(current, baseline, threshold=0.10):
+    """Median of every case in both runs, their ratio and whether it regressed."""
+    rows = []
+    for name, result in current['results'].items():
+        if name not in baseline['results']:
+            continue
+        before, after = baseline['results'][name]['median'], result['median']
+        rows.append({
+            'case': name,
+            'baseline_ms': before * 1000,
+            'current_ms': after * 1000,
+            'ratio': after / before,
+            'regressed': after > before * (1 + threshold),
+        })
+    return pd.DataFrame(rows)
+
+
+# ======================
+# Runner
+# ======================
+def run(cases=tuple(CASES), rows=20_000, seed=42, repeats=5, directory=RESULTS_DIR):
+    with tempfile.TemporaryDirectory() as workdir:
+        ctx = Context(rows, seed, workdir)
+        results = {}
+        for name in cases:
+            fn = CASES[name](ctx)
+            results[name] = time_case(fn, repeats)
+            print(f"{name}: median {results[name]['median'] * 1000:,.2f} ms "
+                  f"(min {results[name]['min'] * 1000:,.2f} ms, {results[name]['number']} loops x {repeats})")
+
+    stored = {'environment': environment(rows, seed), 'results': results}
+    return stored, save_run(stored, directory)
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--only', nargs='+', default=list(CASES), choices=list(CASES), metavar='CASE',
+                        help=f"cases to run: {', '.join(CASES)}")
+    parser.add_argument('--rows', type=int, default=20_000, help="synthetic training rows (default: %(default)s)")
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--repeats', type=int, default=5)
+    parser.add_argument('--compare', nargs='?', const='previous', default=None, metavar='RUN',
+                        help="stored run to compare against (default: the previous run)")
+    parser.add_argument('--threshold', type=float, default=0.10,
+                        help="median slowdown counted as a regression (default: %(default)s)")
+    parser.add_argument('--output-dir', default=RESULTS_DIR)
+    args = parser.parse_args()
+
+    previous = stored_runs(args.output_dir)
+    current, path = run(args.only, args.rows, args.seed, args.repeats, args.output_dir)
+    print(f"Saved {path}")
+
+    if args.compare is not None:
+        baseline_path = args.compare if args.compare != 'previous' else (previous[-1] if previous else None)
+        if baseline_path is None:
+            sys.exit("No stored run to compare against")
+        baseline = load_run(baseline_path)
+        if baseline['environment']['rows'] != args.rows:
+            print(f"Warning: baseline used {baseline['environment']['rows']:,} rows, this run {args.rows:,}")
+        table = compare(current, baseline, args.threshold)
+        print(f"Against {baseline_path} ({baseline['environment']['commit']}):")
+        print(table.to_string(index=False, float_format='{:.3f}'.format))
+        if table['regressed'].any():
+            sys.exit(f"{int(table['regressed'].sum())} case(s) regressed by more than {args.threshold:.0%}")
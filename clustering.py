@@ -0,0 +1,215 @@
+"""Patient clustering computed from the cached preprocessed matrix.
+
+Used by the dashboard's clustering tabs in place of the static PNGs exported
+from ``data_clustering.ipynb``. K-Means runs as ``MiniBatchKMeans`` streamed
+over row chunks with ``partial_fit``, so memory stays bounded as the data
+grows. Hierarchical clustering runs Ward linkage on K-Means micro-clusters
+weighted by their size, so it covers every patient without a dense
+n x n distance matrix. The 2-D projection uses randomized ``TruncatedSVD``
+directly on the sparse matrix and is persisted for reuse.
+
+    python clustering.py         # check that every feature set builds a matrix
+"""
+import os
+
+import joblib
+import numpy as np
+import scipy.cluster.hierarchy as sch
+from sklearn.cluster import MiniBatchKMeans
+from sklearn.decomposition import TruncatedSVD
+
+from data import load_data
+from features import NUMERIC_COLS, ORDINAL_COLS, get_design_matrix, split_features
+
+# ======================
+# Configuration
+# ======================
+FEATURE_SETS = {
+    'All features': None,
+    'Hospital utilization': NUMERIC_COLS + ORDINAL_COLS,
+    'Demographics & admission': ['race', 'gender', 'age', 'admission_type_id',
+                                 'discharge_disposition_id', 'admission_source_id'],
+    'Medications': ['metformin', 'glipizide', 'glyburide', 'pioglitazone', 'rosiglitazone',
+                    'insulin', 'change', 'diabetesMed', 'num_medications'],
+}
+
+CHUNK_SIZE = 8192
+
+N_MICRO_CLUSTERS = 500
+
+REDUCTION_DIR = os.path.join("models", "reduction")
+
+
+# ======================
+# Data
+# ======================
+def clustering_matrix(feature_set='All features'):
+    """Preprocessed matrix and readmission labels for a named feature set."""
+    X, y = split_features(load_data())
+    columns = FEATURE_SETS[feature_set]
+    if columns is not None:
+        X = X[columns]
+    _, Xt = get_design_matrix(X)
+    return Xt, y.to_numpy()
+
+
+def check_feature_sets():
+    """Build the matrix of every entry in ``FEATURE_SETS``; returns their shapes by name."""
+    return {name: clustering_matrix(name)[0].shape for name in FEATURE_SETS}
+
+
+# ======================
+# K-Means
+# ======================
+def minibatch_kmeans(Xt, k, n_epochs=3, chunk_size=CHUNK_SIZE, random_state=42):
+    """Fit ``MiniBatchKMeans`` by streaming shuffled row chunks through ``partial_fit``.
+
+    Returns ``(model, labels)``; labels are assigned chunk by chunk as well.
+    """
+    model = MiniBatchKMeans(n_clusters=k, batch_size=chunk_size, random_state=random_state)
+    rng = np.random.default_rng(random_state)
+    n_rows = Xt.shape[0]
+
+    for _ in range(n_epochs):
+        order = rng.permutation(n_rows)
+        for start in range(0, n_rows, chunk_size):
+            rows = np.sort(order[start:start + chunk_size])
+            model.partial_fit(Xt[rows])
+
+    labels = np.concatenate([
+        model.predict(Xt[start:start + chunk_size]) for start in range(0, n_rows, chunk_size)
+    ])
+    return model, labels
+
+
+# ======================
+# Hierarchical
+# ======================
+def weighted_ward(centers, weights):
+    """Ward linkage of weighted points, in SciPy's linkage-matrix format.
+
+    Each center stands for ``weights[i]`` patients at that location. Starting
+    from the size-aware Ward distance and applying the Lance-Williams update
+    gives the same merges Ward would make over the underlying patients if
+    every micro-cluster were kept intact. Heights are on SciPy's scale; the
+    count column holds the number of centers so SciPy accepts the matrix
+    (see :func:`node_sizes` for patient counts). Uses O(m^2) memory for m
+    centers.
+    """
+    centers = np.asarray(centers, dtype=np.float64)
+    sizes = np.asarray(weights, dtype=np.float64).copy()
+    m = len(centers)
+
+    sq_norms = (centers ** 2).sum(axis=1)
+    sq_dist = np.maximum(sq_norms[:, None] + sq_norms[None, :] - 2 * centers @ centers.T, 0)
+    dist = np.sqrt(2 * sizes[:, None] * sizes[None, :] / (sizes[:, None] + sizes[None, :]) * sq_dist)
+    np.fill_diagonal(dist, np.inf)
+
+    ids = np.arange(m)
+    leaves = np.ones(m)
+    Z = np.empty((m - 1, 4))
+    for step in range(m - 1):
+        i, j = np.unravel_index(np.argmin(dist), dist.shape)
+        if i > j:
+            i, j = j, i
+        d_ij = dist[i, j]
+        size_i, size_j = sizes[i], sizes[j]
+        Z[step] = [min(ids[i], ids[j]), max(ids[i], ids[j]), d_ij, leaves[i] + leaves[j]]
+
+        # Lance-Williams update for Ward, written into row/column i
+        total = sizes + size_i + size_j
+        merged = np.sqrt(np.maximum(
+            ((sizes + size_i) * dist[i] ** 2 + (sizes + size_j) * dist[j] ** 2 - sizes * d_ij ** 2) / total, 0
+        ))
+        dist[i, :] = merged
+        dist[:, i] = merged
+        dist[i, i] = np.inf
+        dist[j, :] = np.inf
+        dist[:, j] = np.inf
+
+        sizes[i] = size_i + size_j
+        leaves[i] += leaves[j]
+        ids[i] = m + step
+    return Z
+
+
+def node_sizes(Z, weights):
+    """Patients under every node of a linkage matrix, indexed by node id."""
+    m = len(weights)
+    sizes = np.concatenate([np.asarray(weights), np.zeros(m - 1, dtype=np.asarray(weights).dtype)])
+    for step, (a, b) in enumerate(Z[:, :2].astype(int)):
+        sizes[m + step] = sizes[a] + sizes[b]
+    return sizes
+
+
+def hierarchical_summary(Xt, n_micro=N_MICRO_CLUSTERS, random_state=42):
+    """Micro-cluster the full matrix, then build the Ward tree over the micro-clusters.
+
+    Returns ``(Z, micro_labels, micro_sizes)``: the linkage matrix, each
+    patient's micro-cluster and the number of patients per micro-cluster.
+    """
+    n_micro = min(n_micro, Xt.shape[0])
+    model, micro_labels = minibatch_kmeans(Xt, n_micro, random_state=random_state)
+    micro_sizes = np.bincount(micro_labels, minlength=n_micro)
+
+    # Empty micro-clusters carry no patients; leave them out of the tree
+    used = np.flatnonzero(micro_sizes)
+    remap = np.full(n_micro, -1)
+    remap[used] = np.arange(len(used))
+    Z = weighted_ward(model.cluster_centers_[used], micro_sizes[used])
+    return Z, remap[micro_labels], micro_sizes[used]
+
+
+def truncated_dendrogram(Z, micro_sizes, p=30):
+    """SciPy dendrogram coordinates for the last ``p`` merges, leaves labelled by patient count."""
+    sizes = node_sizes(Z, micro_sizes)
+    return sch.dendrogram(
+        Z, truncate_mode='lastp', p=p, no_plot=True,
+        leaf_label_func=lambda node: f"({sizes[node]:,})"
+    )
+
+
+def cut_tree(Z, micro_labels, n_clusters):
+    """Flat cluster label (0-based) for every patient from a cut of the tree."""
+    micro_to_cluster = sch.fcluster(Z, t=n_clusters, criterion='maxclust') - 1
+    return micro_to_cluster[micro_labels]
+
+
+# ======================
+# Projection
+# ======================
+def fit_reduction(Xt, n_components=2, random_state=42):
+    """Randomized truncated SVD fitted directly on the (sparse) matrix."""
+    return TruncatedSVD(n_components=n_components, algorithm='randomized', n_iter=5,
+                        random_state=random_state).fit(Xt)
+
+
+def get_reduction(Xt, n_components=2, directory=REDUCTION_DIR):
+    """Fitted reduction for ``Xt``, loaded from disk when it was computed before."""
+    path = os.path.join(directory, f"svd{n_components}-{joblib.hash(Xt)[:16]}.joblib")
+    if os.path.exists(path):
+        return joblib.load(path, mmap_mode='r')
+
+    reduction = fit_reduction(Xt, n_components)
+    os.makedirs(directory, exist_ok=True)
+    joblib.dump(reduction, path + '.tmp')
+    os.replace(path + '.tmp', path)
+    return reduction
+
+
+def project_2d(Xt):
+    """2-D projection used for the scatter plots."""
+    return get_reduction(Xt).transform(Xt)
+
+
+def sample_points(n_rows, max_points, random_state=42):
+    """Sorted row indices of a reproducible sample of at most ``max_points`` rows."""
+    if max_points is None or n_rows <= max_points:
+        return np.arange(n_rows)
+    rng = np.random.default_rng(random_state)
+    return np.sort(rng.choice(n_rows, size=max_points, replace=False))
+
+
+if __name__ == '__main__':
+    for name, (n_rows, n_columns) in check_feature_sets().items():
+        print(f"{name}: {n_rows:,} x {n_columns:,}")
@@ -0,0 +1,142 @@
+"""Typed, columnar cache of ``diabetic_data.csv``.
+
+The raw CSV is parsed once with explicit dtypes and written to Parquet under
+``cache/``. The cache file name carries a content hash of the CSV, so it is
+rebuilt only when the CSV changes. Notebooks and the dashboard load through
+:func:`load_data` and can project just the columns they need.
+"""
+import hashlib
+import os
+import re
+
+import pandas as pd
+
+# ======================
+# Configuration
+# ======================
+RAW_PATH = os.environ.get("DIABETES_DATA", "diabetic_data.csv")
+CACHE_DIR = os.environ.get("DIABETES_CACHE", "cache")
+
+# ======================
+# Schema
+# ======================
+ID_COLS = ['encounter_id', 'patient_nbr']
+
+ADMISSION_COLS = ['admission_type_id', 'discharge_disposition_id', 'admission_source_id']
+
+COUNT_COLS = {
+    'time_in_hospital': 'int8',
+    'num_lab_procedures': 'int16',
+    'num_procedures': 'int8',
+    'num_medications': 'int16',
+    'number_outpatient': 'int16',
+    'number_emergency': 'int16',
+    'number_inpatient': 'int16',
+    'number_diagnoses': 'int8',
+}
+
+MEDICATION_COLS = [
+    'metformin', 'repaglinide', 'nateglinide', 'chlorpropamide', 'glimepiride',
+    'acetohexamide', 'glipizide', 'glyburide', 'tolbutamide', 'pioglitazone',
+    'rosiglitazone', 'acarbose', 'miglitol', 'troglitazone', 'tolazamide',
+    'examide', 'citoglipton', 'insulin', 'glyburide-metformin', 'glipizide-metformin',
+    'glimepiride-pioglitazone', 'metformin-rosiglitazone', 'metformin-pioglitazone'
+]
+
+DIAG_COLS = ['diag_1', 'diag_2', 'diag_3']
+
+CATEGORY_COLS = (
+    ['race', 'gender', 'age', 'weight', 'payer_code', 'medical_specialty']
+    + DIAG_COLS
+    + ['max_glu_serum', 'A1Cresult']
+    + MEDICATION_COLS
+    + ['change', 'diabetesMed', 'readmitted']
+)
+
+DTYPES = {
+    **{c: 'int32' for c in ID_COLS},
+    **{c: 'int8' for c in ADMISSION_COLS},
+    **COUNT_COLS,
+    **{c: 'category' for c in CATEGORY_COLS},
+}
+
+# Column order of the raw CSV
+COLUMNS = (
+    ID_COLS
+    + ['race', 'gender', 'age', 'weight']
+    + ADMISSION_COLS
+    + ['time_in_hospital', 'payer_code', 'medical_specialty']
+    + ['num_lab_procedures', 'num_procedures', 'num_medications',
+       'number_outpatient', 'number_emergency', 'number_inpatient']
+    + DIAG_COLS
+    + ['number_diagnoses', 'max_glu_serum', 'A1Cresult']
+    + MEDICATION_COLS
+    + ['change', 'diabetesMed', 'readmitted']
+)
+
+
+# ======================
+# Cache management
+# ======================
+def file_hash(path, chunk_size=1 << 20):
+    """SHA-256 of a file's contents, read in 1 MB chunks."""
+    digest = hashlib.sha256()
+    with open(path, 'rb') as fh:
+        for chunk in iter(lambda: fh.read(chunk_size), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def _cache_prefix(raw_path):
+    """``<stem>-<source>``: the CSV's name plus a hash of its absolute path.
+
+    Two CSVs with the same name in different directories get separate caches.
+    """
+    stem = os.path.splitext(os.path.basename(raw_path))[0]
+    source = hashlib.sha256(os.path.realpath(raw_path).encode()).hexdigest()[:8]
+    return f"{stem}-{source}"
+
+
+def cache_path(raw_path=RAW_PATH, cache_dir=CACHE_DIR):
+    """Parquet path for the current contents of ``raw_path``."""
+    return os.path.join(cache_dir, f"{_cache_prefix(raw_path)}-{file_hash(raw_path)[:16]}.parquet")
+
+
+def is_parquet(path):
+    """Whether ``path`` names a Parquet file (``.parquet`` or ``.pq``, any case)."""
+    return os.path.splitext(path)[1].lower() in ('.parquet', '.pq')
+
+
+def read_raw(raw_path=RAW_PATH, **kwargs):
+    """Parse the raw CSV with the explicit dtype plan."""
+    return pd.read_csv(raw_path, dtype=DTYPES, **kwargs)
+
+
+def build_cache(raw_path=RAW_PATH, cache_dir=CACHE_DIR):
+    """Convert the CSV to Parquet if no cache exists for its current contents."""
+    target = cache_path(raw_path, cache_dir)
+    if os.path.exists(target):
+        return target
+
+    os.makedirs(cache_dir, exist_ok=True)
+    # Drop caches built from older versions of the same CSV, and nothing else
+    stale = re.compile(re.escape(_cache_prefix(raw_path)) + r"-[0-9a-f]{16}\.parquet")
+    for name in os.listdir(cache_dir):
+        if stale.fullmatch(name):
+            os.remove(os.path.join(cache_dir, name))
+
+    tmp = target + '.tmp'
+    read_raw(raw_path).to_parquet(tmp, index=False)
+    os.replace(tmp, target)
+    return target
+
+
+# ======================
+# Loading
+# ======================
+def load_data(columns=None, raw_path=RAW_PATH, cache_dir=CACHE_DIR):
+    """Load ``diabetic_data.csv`` through the typed Parquet cache.
+
+    ``columns`` projects a subset of columns so only those are read from disk.
+    """
+    return pd.read_parquet(build_cache(raw_path, cache_dir), columns=columns)
@@ -0,0 +1,155 @@
+"""Evaluation stage: test-set metrics for every trained backend.
+
+Trains each backend on the patient-level split from ``splits``, times fit
+and prediction, and writes accuracy, the classification report and the
+confusion matrix to a single JSON metrics store that the dashboard renders. Every evaluated model
+is also registered in ``registry`` together with its metrics.
+
+    python evaluate.py --backends bagging boosting
+"""
+import argparse
+import json
+import os
+import time
+
+import pandas as pd
+from sklearn.metrics import accuracy_score, classification_report, confusion_matrix
+
+from data import load_data
+from models import BACKENDS, train
+from predict import CLASS_LABELS
+from registry import register
+from splits import patient_train_test_split
+
+# ======================
+# Configuration
+# ======================
+METRICS_PATH = os.path.join("models", "metrics.json")
+
+
+# ======================
+# Metrics
+# ======================
+def evaluate(pipeline, X_test, y_test):
+    """Accuracy, classification report, confusion matrix and predict latency on the test set."""
+    start = time.perf_counter()
+    y_pred = pipeline.predict(X_test)
+    predict_seconds = time.perf_counter() - start
+
+    labels = list(range(len(CLASS_LABELS)))
+    return {
+        'accuracy': accuracy_score(y_test, y_pred),
+        'classification_report': classification_report(
+            y_test, y_pred, labels=labels, target_names=CLASS_LABELS, output_dict=True, zero_division=0
+        ),
+        'confusion_matrix': confusion_matrix(y_test, y_pred, labels=labels).tolist(),
+        'n_test': len(y_test),
+        'predict_ms_per_1k': predict_seconds * 1000 / len(X_test) * 1000,
+    }
+
+
+def load_metrics_store(path=METRICS_PATH):
+    """``{backend: metrics}`` for every evaluated model."""
+    with open(path) as fh:
+        return json.load(fh)
+
+
+def record(backend, metrics, path=METRICS_PATH):
+    """Add or replace the entry for ``backend`` in the metrics store."""
+    try:
+        store = load_metrics_store(path)
+    except FileNotFoundError:
+        store = {}
+    store[backend] = metrics
+
+    os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+    with open(path + '.tmp', 'w') as fh:
+        json.dump(store, fh, indent=1, default=float)
+    os.replace(path + '.tmp', path)
+    return store
+
+
+def summary_table(store):
+    """One row per model with the headline metrics, in store order."""
+    rows = []
+    for backend, metrics in store.items():
+        report = metrics['classification_report']
+        rows.append({
+            'backend': backend,
+            'model': metrics.get('name', backend),
+            'accuracy': metrics['accuracy'],
+            'macro_precision': report['macro avg']['precision'],
+            'macro_recall': report['macro avg']['recall'],
+            'macro_f1': report['macro avg']['f1-score'],
+            'weighted_f1': report['weighted avg']['f1-score'],
+            'fit_seconds': metrics.get('fit_seconds'),
+            'predict_ms_per_1k': metrics['predict_ms_per_1k'],
+        })
+    return pd.DataFrame(rows)
+
+
+def report_table(metrics):
+    """Per-class classification report as a DataFrame."""
+    report = metrics['classification_report']
+    return pd.DataFrame(
+        [{'Class': label, 'Precision': report[label]['precision'], 'Recall': report[label]['recall'],
+          'F1-Score': report[label]['f1-score'], 'Support': int(report[label]['support'])}
+         for label in CLASS_LABELS]
+    )
+
+
+def test_class_counts(store):
+    """Test-set encounters per class; every model in the store shares the same split."""
+    report = next(iter(store.values()))['classification_report']
+    return [int(report[label]['support']) for label in CLASS_LABELS]
+
+
+def class_leaders(store, metric='f1-score'):
+    """The model with the best ``metric`` for each class."""
+    rows = []
+    for label in CLASS_LABELS:
+        backend = max(store, key=lambda b: store[b]['classification_report'][label][metric])
+        rows.append({
+            'label': label,
+            'backend': backend,
+            'model': store[backend].get('name', backend),
+            'score': store[backend]['classification_report'][label][metric],
+        })
+    return pd.DataFrame(rows)
+
+
+def top_confusion(metrics):
+    """``(true label, predicted label, count, class size)`` of the largest off-diagonal confusion cell."""
+    matrix = metrics['confusion_matrix']
+    count, true, predicted = max((count, i, j) for i, row in enumerate(matrix)
+                                 for j, count in enumerate(row) if i != j)
+    return CLASS_LABELS[true], CLASS_LABELS[predicted], count, sum(matrix[true])
+
+
+# ======================
+# Stage
+# ======================
+def run(backends=('bagging', 'boosting'), path=METRICS_PATH):
+    """Train, evaluate and register each backend, then record its metrics."""
+    X_train, X_test, y_train, y_test = patient_train_test_split(load_data())
+
+    for backend in backends:
+        start = time.perf_counter()
+        pipeline = train(backend, X_train, y_train)
+        fit_seconds = time.perf_counter() - start
+
+        metrics = {'name': BACKENDS[backend]['name'], 'fit_seconds': fit_seconds,
+                   **evaluate(pipeline, X_test, y_test)}
+        metrics['version'] = register(backend, pipeline, X_train, metrics, metrics['confusion_matrix'])
+        record(backend, metrics, path)
+        print(f"{backend}: accuracy {metrics['accuracy']:.4f}, fit {fit_seconds:.1f}s "
+              f"(registered version {metrics['version']})")
+    return load_metrics_store(path)
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Evaluate the training backends and update the metrics store.")
+    parser.add_argument('--backends', nargs='+', default=['bagging', 'boosting'], choices=list(BACKENDS))
+    parser.add_argument('--output', default=METRICS_PATH)
+    args = parser.parse_args()
+    run(args.backends, args.output)
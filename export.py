@@ -0,0 +1,176 @@
+"""ONNX export of the fitted pipeline and a CPU runtime for single encounters.
+
+``Pipeline.predict_proba`` on a one-row DataFrame spends most of its time in
+ColumnTransformer / pandas overhead rather than in the trees. Exporting the
+whole preprocessing + boosting pipeline to one ONNX graph and running it with
+onnxruntime keeps per-encounter latency in the sub-millisecond range.
+
+    python export.py                      # models/boosting_pipeline.onnx
+    python -m benchmarks.latency          # sklearn vs ONNX latency percentiles
+
+The categorical imputers are not convertible (skl2onnx only imputes string
+placeholders), so they are dropped from the graph and their fill values are
+stored in the model metadata and applied by :class:`OnnxScorer` on the host.
+"""
+import argparse
+import copy
+import json
+import os
+
+import numpy as np
+import onnxruntime as ort
+import pandas as pd
+from skl2onnx import convert_sklearn
+from skl2onnx.common.data_types import FloatTensorType, Int64TensorType, StringTensorType
+from sklearn.impute import SimpleImputer
+
+from data import load_data
+from features import NUMERIC_COLS, split_features
+from predict import MODEL_PATH, load_pipeline
+
+# ======================
+# Configuration
+# ======================
+ONNX_PATH = os.path.splitext(MODEL_PATH)[0] + '.onnx'
+
+TARGET_OPSET = 17
+
+FILL_VALUES_KEY = 'fill_values'
+
+COLUMNS_KEY = 'input_columns'
+
+
+# ======================
+# Export
+# ======================
+def onnx_ready(pipeline):
+    """Copy of ``pipeline`` that skl2onnx can convert, plus the dropped categorical fill values.
+
+    The float cast in the numeric block becomes an identity (the graph takes
+    float inputs) and leading ``SimpleImputer`` steps of the categorical
+    blocks are removed.
+    """
+    pipeline = copy.deepcopy(pipeline)
+    preprocessor = pipeline[0]
+    fill_values = {}
+
+    for i, (name, transformer, columns) in enumerate(preprocessor.transformers_):
+        if name == 'num':
+            transformer.named_steps['cast'].set_params(func=None, kw_args=None)
+        elif hasattr(transformer, 'steps') and isinstance(transformer.steps[0][1], SimpleImputer):
+            imputer = transformer.steps[0][1]
+            fill_values.update({c: v.item() if hasattr(v, 'item') else v
+                                for c, v in zip(columns, imputer.statistics_)})
+            preprocessor.transformers_[i] = (name, transformer[1:], columns)
+    return pipeline, fill_values
+
+
+def input_types(pipeline, X):
+    """ONNX input per column: float for the counts, int64 for integer codes, string otherwise."""
+    types = []
+    for _, _, columns in pipeline[0].transformers_:
+        if isinstance(columns, str):
+            continue
+        for column in columns:
+            if column in NUMERIC_COLS:
+                types.append((column, FloatTensorType([None, 1])))
+            elif pd.api.types.is_integer_dtype(X[column]):
+                types.append((column, Int64TensorType([None, 1])))
+            else:
+                types.append((column, StringTensorType([None, 1])))
+    return types
+
+
+def export_onnx(pipeline, X, path=ONNX_PATH):
+    """Convert the fitted ``pipeline`` to ONNX; ``X`` supplies the input dtypes."""
+    ready, fill_values = onnx_ready(pipeline)
+    types = input_types(ready, X)
+    model = convert_sklearn(
+        ready, initial_types=types,
+        options={id(ready[-1]): {'zipmap': False}}, target_opset=TARGET_OPSET
+    )
+
+    # skl2onnx sanitises input names (e.g. 'glyburide-metformin'), so keep the mapping
+    columns = {graph_input.name: column for graph_input, (column, _) in zip(model.graph.input, types)}
+    for key, value in [(FILL_VALUES_KEY, fill_values), (COLUMNS_KEY, columns)]:
+        meta = model.metadata_props.add()
+        meta.key, meta.value = key, json.dumps(value, default=str)
+
+    os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+    with open(path + '.tmp', 'wb') as fh:
+        fh.write(model.SerializeToString())
+    os.replace(path + '.tmp', path)
+    return path
+
+
+# ======================
+# Runtime
+# ======================
+ONNX_DTYPES = {
+    'tensor(float)': np.float32,
+    'tensor(int64)': np.int64,
+    'tensor(string)': object,
+}
+
+
+class OnnxScorer:
+    """Score encounters with an exported ONNX pipeline on the CPU.
+
+    Accepts a DataFrame in ``diabetic_data.csv`` format or a single encounter
+    as a dict. One intra-op thread by default: single encounters are too small
+    to benefit from more, and serving processes scale out instead.
+    """
+
+    def __init__(self, path=ONNX_PATH, threads=1):
+        options = ort.SessionOptions()
+        options.intra_op_num_threads = threads
+        options.inter_op_num_threads = 1
+        self.session = ort.InferenceSession(path, options, providers=['CPUExecutionProvider'])
+
+        meta = self.session.get_modelmeta().custom_metadata_map
+        self.fill_values = json.loads(meta.get(FILL_VALUES_KEY, '{}'))
+        columns = json.loads(meta.get(COLUMNS_KEY, '{}'))
+        self.inputs = [(i.name, columns.get(i.name, i.name), ONNX_DTYPES[i.type]) for i in self.session.get_inputs()]
+        self.output = next(o.name for o in self.session.get_outputs() if o.name == 'probabilities')
+
+    def _feeds_from_record(self, record):
+        feeds = {}
+        for name, column, dtype in self.inputs:
+            value = record.get(column)
+            if value is None or value != value:
+                value = self.fill_values.get(column, np.nan)
+            feeds[name] = np.array([[str(value) if dtype is object else value]], dtype=dtype)
+        return feeds
+
+    def _feeds_from_frame(self, df):
+        feeds = {}
+        for name, column, dtype in self.inputs:
+            values = df[column].to_numpy(dtype=object if dtype is object else None)
+            if column in self.fill_values and pd.isna(values).any():
+                values = np.where(pd.isna(values), self.fill_values[column], values)
+            feeds[name] = (values.astype(str) if dtype is object else values).astype(dtype).reshape(-1, 1)
+        return feeds
+
+    def predict_proba(self, encounters):
+        """Class probabilities (columns in ``CLASS_LABELS`` order) for a frame or one dict."""
+        if isinstance(encounters, dict):
+            feeds = self._feeds_from_record(encounters)
+        else:
+            feeds = self._feeds_from_frame(encounters)
+        return self.session.run([self.output], feeds)[0]
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Export the persisted pipeline to ONNX.")
+    parser.add_argument('--model', default=MODEL_PATH, help="pipeline to export (default: %(default)s)")
+    parser.add_argument('--output', default=None, help="ONNX file (default: next to --model)")
+    args = parser.parse_args()
+
+    output = args.output or os.path.splitext(args.model)[0] + '.onnx'
+    X, _ = split_features(load_data().head(100))
+    pipeline = load_pipeline(args.model)
+    export_onnx(pipeline, X, output)
+
+    expected = pipeline.predict_proba(X)
+    max_diff = np.abs(OnnxScorer(output).predict_proba(load_data().head(100)) - expected).max()
+    print(f"Exported {args.model} -> {output} (max probability difference {max_diff:.2e})")
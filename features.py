@@ -0,0 +1,410 @@
+"""Shared feature preprocessing for classification, clustering and the dashboard.
+
+Defines the column groups and the ``ColumnTransformer`` that used to be
+copied into every notebook cell, and persists the fitted transformer with
+joblib so it is fit once per version of the training data. Transformed
+design matrices are cached as sparse ``.npz`` files so repeated model fits
+skip preprocessing.
+
+The ``grouped`` preprocessor shrinks the one-hot matrix by mapping the
+ICD-9 diagnosis codes to clinical chapters and collapsing rare levels of the
+other categoricals. ``ExtendedVocabulary`` appends columns for codes that
+first appear in a later batch of encounters.
+"""
+import hashlib
+import os
+
+import joblib
+import numpy as np
+import pandas as pd
+import scipy.sparse as sp
+from sklearn.base import BaseEstimator, TransformerMixin, clone
+from sklearn.compose import ColumnTransformer
+from sklearn.impute import SimpleImputer
+from sklearn.pipeline import Pipeline
+from sklearn.preprocessing import FunctionTransformer, OneHotEncoder, OrdinalEncoder, StandardScaler
+
+from data import DIAG_COLS
+
+# ======================
+# Configuration
+# ======================
+PREPROCESSOR_DIR = os.environ.get("READMISSION_PREPROCESSOR_DIR", "models")
+TRANSFORM_CACHE_DIR = os.environ.get("READMISSION_TRANSFORM_CACHE", os.path.join("cache", "transformed"))
+
+# Every preprocessor emits float32: half the memory of float64, and the tree
+# models convert their input to float32 anyway
+FLOAT_DTYPE = np.float32
+
+# ======================
+# Column groups
+# ======================
+NUMERIC_COLS = [
+    'time_in_hospital', 'num_lab_procedures', 'num_procedures',
+    'num_medications', 'number_outpatient', 'number_emergency',
+    'number_inpatient', 'number_diagnoses'
+]
+
+ORDINAL_COLS = ['age']
+
+AGE_BINS = [
+    '[0-10)', '[10-20)', '[20-30)', '[30-40)', '[40-50)',
+    '[50-60)', '[60-70)', '[70-80)', '[80-90)', '[90-100)'
+]
+
+# Identifiers and mostly-missing columns removed before modelling
+DROP_COLS = ['encounter_id', 'patient_nbr', 'weight', 'payer_code', 'max_glu_serum', 'A1Cresult']
+
+TARGET_COLS = ['readmitted', 'readmitted_num']
+
+TARGET_MAPPING = {'NO': 0, '>30': 1, '<30': 2}
+
+# ICD-9 chapters as [start, end) ranges of the numeric code
+ICD9_CHAPTERS = [
+    (1, 140, 'infectious'),
+    (140, 240, 'neoplasms'),
+    (240, 280, 'endocrine'),
+    (280, 290, 'blood'),
+    (290, 320, 'mental'),
+    (320, 390, 'nervous'),
+    (390, 460, 'circulatory'),
+    (460, 520, 'respiratory'),
+    (520, 580, 'digestive'),
+    (580, 630, 'genitourinary'),
+    (630, 680, 'pregnancy'),
+    (680, 710, 'skin'),
+    (710, 740, 'musculoskeletal'),
+    (740, 760, 'congenital'),
+    (760, 780, 'perinatal'),
+    (780, 800, 'symptoms'),
+    (800, 1000, 'injury'),
+]
+
+# Symptom codes grouped with their organ system
+ICD9_SYMPTOM_GROUPS = {785: 'circulatory', 786: 'respiratory', 787: 'digestive', 788: 'genitourinary'}
+
+
+# ======================
+# Frame preparation
+# ======================
+def split_features(df):
+    """Return ``(X, y)`` from a raw encounter frame; ``y`` is None without a target."""
+    y = None
+    if 'readmitted_num' in df.columns:
+        y = df['readmitted_num']
+    elif 'readmitted' in df.columns:
+        y = df['readmitted'].map(TARGET_MAPPING).astype('int8')
+    X = df.drop(columns=[c for c in DROP_COLS + TARGET_COLS if c in df.columns])
+    return X, y
+
+
+def categorical_columns(X):
+    """Everything that is not numeric or ordinal is treated as categorical."""
+    return [c for c in X.columns if c not in NUMERIC_COLS + ORDINAL_COLS]
+
+
+def column_groups(X):
+    """Keyword arguments for a preprocessor builder covering just the columns of ``X``."""
+    return {
+        'categorical_cols': categorical_columns(X),
+        'numeric_cols': [c for c in NUMERIC_COLS if c in X.columns],
+        'ordinal_cols': [c for c in ORDINAL_COLS if c in X.columns],
+    }
+
+
+# ======================
+# Preprocessor
+# ======================
+def as_float(X, dtype=FLOAT_DTYPE):
+    """Cast a numeric block to ``dtype`` before imputation and scaling."""
+    return np.asarray(X, dtype=dtype)
+
+
+def numeric_pipeline(dtype=FLOAT_DTYPE):
+    return Pipeline([
+        ('cast', FunctionTransformer(as_float, kw_args={'dtype': dtype}, feature_names_out='one-to-one')),
+        ('imputer', SimpleImputer(strategy='median')),
+        ('scaler', StandardScaler())
+    ])
+
+
+def ordinal_pipeline(dtype=FLOAT_DTYPE):
+    return Pipeline([
+        ('imputer', SimpleImputer(strategy='most_frequent')),
+        ('encoder', OrdinalEncoder(categories=[AGE_BINS], dtype=dtype))
+    ])
+
+
+def build_preprocessor(categorical_cols, dtype=FLOAT_DTYPE, numeric_cols=NUMERIC_COLS, ordinal_cols=ORDINAL_COLS):
+    """Unfitted ColumnTransformer shared by every model."""
+    categorical_pipe = Pipeline([
+        ('imputer', SimpleImputer(strategy='most_frequent')),
+        ('encoder', OneHotEncoder(handle_unknown='ignore', dtype=dtype))
+    ])
+
+    return ColumnTransformer([
+        ('num', numeric_pipeline(dtype), numeric_cols),
+        ('ord', ordinal_pipeline(dtype), ordinal_cols),
+        ('cat', categorical_pipe, categorical_cols)
+    ])
+
+
+def build_native_preprocessor(categorical_cols, max_categories=255, dtype=FLOAT_DTYPE,
+                              numeric_cols=NUMERIC_COLS, ordinal_cols=ORDINAL_COLS):
+    """Unfitted ColumnTransformer for tree models with native categorical support.
+
+    Categoricals are ordinal-coded instead of one-hot encoded; levels beyond
+    ``max_categories`` are grouped as infrequent and missing values stay NaN.
+    Output columns are numeric, then age, then one column per categorical.
+    """
+    numeric_cast = FunctionTransformer(as_float, kw_args={'dtype': dtype}, feature_names_out='one-to-one')
+
+    ordinal_encoder = OrdinalEncoder(
+        categories=[AGE_BINS],
+        handle_unknown='use_encoded_value', unknown_value=np.nan, dtype=dtype
+    )
+
+    categorical_encoder = OrdinalEncoder(
+        handle_unknown='use_encoded_value', unknown_value=np.nan,
+        max_categories=max_categories, dtype=dtype
+    )
+
+    return ColumnTransformer([
+        ('num', numeric_cast, numeric_cols),
+        ('ord', ordinal_encoder, ordinal_cols),
+        ('cat', categorical_encoder, categorical_cols)
+    ])
+
+
+def native_categorical_indices(preprocessor):
+    """Positions of the categorical columns in a fitted native preprocessor's output.
+
+    Read from ``output_indices_`` so they stay right when the frame lacks
+    some of the numeric or ordinal columns.
+    """
+    positions = preprocessor.output_indices_['cat']
+    return list(range(positions.start, positions.stop))
+
+
+def icd9_chapter(codes):
+    """Map ICD-9 codes to clinical chapters; diabetes (250.xx) gets its own group.
+
+    Only the distinct codes are parsed, so the cost scales with the number of
+    levels rather than the number of rows.
+    """
+    uniques, inverse = np.unique(np.asarray(codes, dtype=str), return_inverse=True)
+
+    numeric = pd.to_numeric(pd.Series(uniques), errors='coerce').to_numpy()
+    whole = np.floor(numeric)
+    chapters = np.full(len(uniques), 'missing', dtype=object)
+    for start, end, name in ICD9_CHAPTERS:
+        chapters[(whole >= start) & (whole < end)] = name
+    for code, name in ICD9_SYMPTOM_GROUPS.items():
+        chapters[whole == code] = name
+    chapters[whole == 250] = 'diabetes'
+    chapters[np.char.startswith(uniques, 'V')] = 'supplementary'
+    chapters[np.char.startswith(uniques, 'E')] = 'external'
+
+    return chapters[inverse.reshape(-1)]
+
+
+def icd9_chapters(X):
+    """Column-wise :func:`icd9_chapter` for a frame of diagnosis codes."""
+    return pd.DataFrame({c: icd9_chapter(X[c]) for c in X.columns}, index=X.index)
+
+
+def build_grouped_preprocessor(categorical_cols, min_frequency=0.01, dtype=FLOAT_DTYPE,
+                               numeric_cols=NUMERIC_COLS, ordinal_cols=ORDINAL_COLS):
+    """One-hot preprocessor with ICD-9 chapters and rare-level collapsing.
+
+    ``diag_1..3`` are mapped to ~20 clinical chapters before encoding; levels
+    of the other categoricals seen in less than ``min_frequency`` of rows
+    share a single infrequent column.
+    """
+    diag_cols = [c for c in categorical_cols if c in DIAG_COLS]
+    other_cols = [c for c in categorical_cols if c not in DIAG_COLS]
+
+    diag_pipe = Pipeline([
+        ('chapter', FunctionTransformer(icd9_chapters, feature_names_out='one-to-one')),
+        ('encoder', OneHotEncoder(handle_unknown='ignore', dtype=dtype))
+    ])
+
+    categorical_pipe = Pipeline([
+        ('imputer', SimpleImputer(strategy='most_frequent')),
+        ('encoder', OneHotEncoder(handle_unknown='infrequent_if_exist', min_frequency=min_frequency, dtype=dtype))
+    ])
+
+    return ColumnTransformer([
+        ('num', numeric_pipeline(dtype), numeric_cols),
+        ('ord', ordinal_pipeline(dtype), ordinal_cols),
+        ('diag', diag_pipe, diag_cols),
+        ('cat', categorical_pipe, other_cols)
+    ])
+
+
+PREPROCESSORS = {
+    'onehot': build_preprocessor,
+    'native': build_native_preprocessor,
+    'grouped': build_grouped_preprocessor,
+}
+
+
+# ======================
+# Vocabulary extension
+# ======================
+def known_categories(preprocessor):
+    """Categories each one-hot encoded column of a fitted preprocessor already has columns for.
+
+    Diagnosis columns mapped to ICD-9 chapters are skipped: every code
+    already lands in a chapter.
+    """
+    if isinstance(preprocessor, ExtendedVocabulary):
+        known = known_categories(preprocessor.base)
+        for column, codes in zip(preprocessor.columns_, preprocessor.encoder_.categories_):
+            known[column] = known[column] | set(codes)
+        return known
+
+    known = {}
+    for _, transformer, columns in preprocessor.transformers_:
+        if not isinstance(transformer, Pipeline) or 'chapter' in transformer.named_steps:
+            continue
+        encoder = transformer.steps[-1][1]
+        if isinstance(encoder, OneHotEncoder):
+            known.update({c: set(codes) for c, codes in zip(columns, encoder.categories_)})
+    return known
+
+
+class ExtendedVocabulary(TransformerMixin, BaseEstimator):
+    """A fitted one-hot preprocessor plus columns for codes it has never seen.
+
+    ``fit`` collects the codes in ``X`` that ``base`` has no column for
+    (seen at least ``min_count`` times) and one-hot encodes them in extra
+    columns appended after the base output, so every column index a model
+    was trained on keeps its meaning. Extensions can be stacked batch after
+    batch.
+    """
+
+    def __init__(self, base, min_count=1, dtype=FLOAT_DTYPE):
+        self.base = base
+        self.min_count = min_count
+        self.dtype = dtype
+
+    def fit(self, X, y=None):
+        self.feature_names_in_ = self.base.feature_names_in_
+        self.n_features_in_ = self.base.n_features_in_
+
+        columns, categories = [], []
+        for column, known in known_categories(self.base).items():
+            counts = X[column].value_counts()
+            new_codes = sorted(c for c in counts.index[counts >= self.min_count] if c not in known)
+            if new_codes:
+                columns.append(column)
+                categories.append(new_codes)
+
+        self.columns_ = columns
+        self.encoder_ = OneHotEncoder(categories=categories, handle_unknown='ignore', dtype=self.dtype)
+        if columns:
+            self.encoder_.fit(X[columns])
+        else:
+            self.encoder_.categories_ = []
+        return self
+
+    def transform(self, X):
+        Xt = self.base.transform(X)
+        if not self.columns_:
+            return Xt
+        return sp.hstack([sp.csr_matrix(Xt), self.encoder_.transform(X[self.columns_])], format='csr')
+
+    @property
+    def n_new_columns_(self):
+        return sum(len(codes) for codes in self.encoder_.categories_)
+
+
+def frame_fingerprint(X):
+    """Stable hash of a DataFrame's columns and contents."""
+    digest = hashlib.sha256()
+    digest.update('|'.join(map(str, X.columns)).encode())
+    digest.update(pd.util.hash_pandas_object(X, index=False).values.tobytes())
+    return digest.hexdigest()[:16]
+
+
+def preprocessor_path(X, kind='onehot', directory=PREPROCESSOR_DIR):
+    """Cache file keyed by ``kind``, the unfitted builder's parameters and ``X``.
+
+    Hashing the unfitted preprocessor means a change to a builder (new
+    columns, encoder settings, dtype) gets a new file instead of reusing a
+    stale fit.
+    """
+    unfitted = joblib.hash(PREPROCESSORS[kind](**column_groups(X)))[:16]
+    return os.path.join(directory, f"preprocessor-{kind}-{unfitted}-{frame_fingerprint(X)}.joblib")
+
+
+def get_preprocessor(X, kind='onehot', directory=PREPROCESSOR_DIR):
+    """Fitted preprocessor for ``X``, fit and persisted on first use.
+
+    ``kind`` selects a builder from ``PREPROCESSORS``. The file is keyed by
+    the builder's parameters and a fingerprint of ``X``, so every cell that
+    trains on the same frame reuses one fit. Arrays are loaded memory-mapped.
+    """
+    path = preprocessor_path(X, kind, directory)
+    if os.path.exists(path):
+        return joblib.load(path, mmap_mode='r')
+
+    preprocessor = PREPROCESSORS[kind](**column_groups(X))
+    preprocessor.fit(X)
+    preprocessor.fit_fingerprint_ = frame_fingerprint(X)
+
+    os.makedirs(directory, exist_ok=True)
+    tmp = path + '.tmp'
+    joblib.dump(preprocessor, tmp)
+    os.replace(tmp, path)
+    return preprocessor
+
+
+# ======================
+# Transform cache
+# ======================
+def preprocessor_key(preprocessor):
+    """Preprocessing parameters plus the fingerprint of the frame they were fit on."""
+    fitted_on = getattr(preprocessor, 'fit_fingerprint_', None)
+    if fitted_on is None:
+        # Not fit through get_preprocessor: fall back to hashing the fitted state
+        return joblib.hash(preprocessor)[:16]
+    return f"{fitted_on}-{joblib.hash(clone(preprocessor))[:16]}"
+
+
+def transform_path(preprocessor, X, cache_dir=TRANSFORM_CACHE_DIR):
+    """Cache file stem keyed by the data fingerprint and the preprocessing parameters."""
+    key = f"{frame_fingerprint(X)}-{preprocessor_key(preprocessor)}"
+    return os.path.join(cache_dir, f"X-{key}")
+
+
+def cached_transform(preprocessor, X, cache_dir=TRANSFORM_CACHE_DIR):
+    """``preprocessor.transform(X)``, read from disk after the first call.
+
+    Sparse output is stored as CSR ``.npz``; dense output (native
+    categorical preprocessing) as ``.npy`` loaded memory-mapped.
+    """
+    stem = transform_path(preprocessor, X, cache_dir)
+    if os.path.exists(stem + '.npz'):
+        return sp.load_npz(stem + '.npz')
+    if os.path.exists(stem + '.npy'):
+        return np.load(stem + '.npy', mmap_mode='r')
+
+    Xt = preprocessor.transform(X)
+
+    os.makedirs(cache_dir, exist_ok=True)
+    if sp.issparse(Xt):
+        Xt = sp.csr_matrix(Xt)
+        sp.save_npz(stem + '.tmp.npz', Xt)
+        os.replace(stem + '.tmp.npz', stem + '.npz')
+    else:
+        np.save(stem + '.tmp.npy', Xt)
+        os.replace(stem + '.tmp.npy', stem + '.npy')
+    return Xt
+
+
+def get_design_matrix(X, kind='onehot'):
+    """Fitted preprocessor and cached design matrix for ``X``."""
+    preprocessor = get_preprocessor(X, kind)
+    return preprocessor, cached_transform(preprocessor, X)
@@ -0,0 +1,145 @@
+"""Per-patient history features and an indexed lookup store.
+
+``number_inpatient`` / ``number_emergency`` / ``number_outpatient`` are
+counts reported on the encounter itself; nothing summarises the patient's
+earlier encounters in this dataset. This stage sorts all encounters by
+``patient_nbr`` and ``encounter_id`` once and computes prior-visit
+aggregates with a vectorized ``groupby().cumsum()``.
+Each row only sees encounters strictly before it.
+
+For scoring, the aggregates over each patient's full history are persisted
+to Parquet as one row per patient. :class:`HistoryStore` loads them behind a
+hash index on ``patient_nbr``, so a new encounter's history is a
+constant-time lookup instead of a scan of the encounter table.
+
+    python history.py            # build cache/history/history-<hash>.parquet
+"""
+import os
+
+import numpy as np
+import pandas as pd
+
+from data import CACHE_DIR, RAW_PATH, file_hash, load_data
+
+# ======================
+# Configuration
+# ======================
+HISTORY_DIR = os.path.join(CACHE_DIR, "history")
+
+# Prior-visit totals: feature name -> encounter column that is summed
+PRIOR_SUMS = {
+    'prior_days_in_hospital': 'time_in_hospital',
+    'prior_medications': 'num_medications',
+    'prior_lab_procedures': 'num_lab_procedures',
+    'prior_emergency_visits': 'number_emergency',
+}
+
+HISTORY_COLS = ['prior_encounters', 'prior_readmitted', 'prior_readmitted_30'] + list(PRIOR_SUMS)
+
+HISTORY_DTYPE = np.int32
+
+
+# ======================
+# Aggregation
+# ======================
+def _visit_values(df):
+    """Per-encounter quantities that accumulate into the history columns."""
+    values = pd.DataFrame({'prior_encounters': np.ones(len(df), dtype=HISTORY_DTYPE)}, index=df.index)
+    readmitted = df['readmitted'].astype(str).to_numpy()
+    values['prior_readmitted'] = (readmitted != 'NO').astype(HISTORY_DTYPE)
+    values['prior_readmitted_30'] = (readmitted == '<30').astype(HISTORY_DTYPE)
+    for name, column in PRIOR_SUMS.items():
+        values[name] = df[column].to_numpy().astype(HISTORY_DTYPE)
+    return values
+
+
+def _sorted(df):
+    """``df`` ordered by patient, then encounter."""
+    order = np.lexsort((df['encounter_id'].to_numpy(), df['patient_nbr'].to_numpy()))
+    return df.iloc[order]
+
+
+def history_features(df):
+    """Aggregates over each encounter's earlier encounters, aligned to ``df.index``.
+
+    Needs ``patient_nbr``, ``encounter_id``, ``readmitted`` and the columns in
+    ``PRIOR_SUMS``. A patient's first encounter gets zeros.
+    """
+    encounters = _sorted(df)
+    values = _visit_values(encounters)
+    inclusive = values.groupby(encounters['patient_nbr'].to_numpy(), sort=False).cumsum()
+    return (inclusive - values).astype(HISTORY_DTYPE).loc[df.index]
+
+
+def patient_history(df):
+    """History each patient carries into their next encounter, one row per ``patient_nbr``."""
+    values = _visit_values(df)
+    return values.groupby(df['patient_nbr'].to_numpy()).sum().astype(HISTORY_DTYPE).rename_axis('patient_nbr')
+
+
+# ======================
+# Lookup store
+# ======================
+def history_path(raw_path=RAW_PATH, directory=HISTORY_DIR):
+    return os.path.join(directory, f"history-{file_hash(raw_path)[:16]}.parquet")
+
+
+def build_history(raw_path=RAW_PATH, directory=HISTORY_DIR):
+    """Persist :func:`patient_history` for the current data if it is not cached yet."""
+    target = history_path(raw_path, directory)
+    if os.path.exists(target):
+        return target
+
+    columns = ['encounter_id', 'patient_nbr', 'readmitted'] + list(PRIOR_SUMS.values())
+    history = patient_history(load_data(columns=columns, raw_path=raw_path))
+
+    os.makedirs(directory, exist_ok=True)
+    history.reset_index().to_parquet(target + '.tmp', index=False)
+    os.replace(target + '.tmp', target)
+    return target
+
+
+class HistoryStore:
+    """Constant-time access to per-patient history by ``patient_nbr``."""
+
+    def __init__(self, history):
+        self.index = pd.Index(history.index)
+        self.values = history[HISTORY_COLS].to_numpy()
+        # Force the hash table now so the first request doesn't pay for it
+        self.index.get_indexer(self.index[:1])
+        self._positions = dict(zip(self.index.tolist(), range(len(self.index))))
+        self._empty = dict.fromkeys(HISTORY_COLS, 0)
+
+    @classmethod
+    def load(cls, raw_path=RAW_PATH, directory=HISTORY_DIR):
+        history = pd.read_parquet(build_history(raw_path, directory))
+        return cls(history.set_index('patient_nbr'))
+
+    def __len__(self):
+        return len(self.index)
+
+    def get(self, patient_nbr):
+        """History of one patient as a dict (a single dict lookup, for per-request scoring)."""
+        position = self._positions.get(patient_nbr)
+        if position is None:
+            return dict(self._empty)
+        return dict(zip(HISTORY_COLS, self.values[position].tolist()))
+
+    def lookup(self, patient_nbrs):
+        """History rows for ``patient_nbrs``; patients never seen before get zeros."""
+        positions = self.index.get_indexer(np.atleast_1d(patient_nbrs))
+        rows = np.zeros((len(positions), len(HISTORY_COLS)), dtype=self.values.dtype)
+        known = positions >= 0
+        rows[known] = self.values[positions[known]]
+        return pd.DataFrame(rows, columns=HISTORY_COLS)
+
+    def enrich(self, df):
+        """``df`` with the history columns of each encounter's patient appended."""
+        history = self.lookup(df['patient_nbr'].to_numpy())
+        history.index = df.index
+        return pd.concat([df, history], axis=1)
+
+
+if __name__ == '__main__':
+    path = build_history()
+    print(f"{len(HistoryStore.load()):,} patients -> {path}")
@@ -0,0 +1,129 @@
+"""Selectable training backends for the readmission classifiers.
+
+Each backend pairs an estimator with the preprocessing it expects:
+the bagging and gradient boosting models train on the one-hot matrix,
+``hist_boosting`` trains ``HistGradientBoostingClassifier`` on ordinal-coded
+categoricals with native categorical splits.
+"""
+import os
+import time
+
+import pandas as pd
+from sklearn.ensemble import BaggingClassifier, GradientBoostingClassifier, HistGradientBoostingClassifier
+from sklearn.metrics import accuracy_score
+from sklearn.pipeline import Pipeline
+from sklearn.tree import DecisionTreeClassifier
+from threadpoolctl import threadpool_limits
+
+from features import cached_transform, get_preprocessor, native_categorical_indices
+
+# ======================
+# Configuration
+# ======================
+COMPARISON_PATH = os.path.join("models", "backend_comparison.csv")
+
+# Worker processes (joblib/loky) for bagging fit and predict; -1 uses all cores
+N_JOBS = int(os.environ.get("READMISSION_N_JOBS", "-1"))
+
+BACKENDS = {
+    'bagging': {
+        'name': 'Bagging',
+        'preprocessing': 'onehot',
+        'params': dict(n_estimators=50, max_samples=0.8, max_features=1.0, bootstrap=True,
+                       n_jobs=N_JOBS, random_state=42),
+    },
+    'boosting': {
+        'name': 'Gradient Boosting',
+        'preprocessing': 'onehot',
+        'params': dict(n_estimators=150, learning_rate=0.05, max_depth=3, random_state=42),
+    },
+    'hist_boosting': {
+        'name': 'Hist Gradient Boosting',
+        'preprocessing': 'native',
+        'params': dict(max_iter=500, learning_rate=0.05, early_stopping=True,
+                       validation_fraction=0.1, n_iter_no_change=20, random_state=42),
+    },
+}
+
+
+# ======================
+# Estimators
+# ======================
+def build_estimator(backend, categorical_features=None, **params):
+    """Unfitted estimator for ``backend`` with the repo defaults, overridable by ``params``.
+
+    ``categorical_features`` are the categorical column positions in the
+    preprocessed matrix (see :func:`features.native_categorical_indices`);
+    only ``hist_boosting`` uses them.
+    """
+    params = {**BACKENDS[backend]['params'], **params}
+
+    if backend == 'bagging':
+        return BaggingClassifier(estimator=DecisionTreeClassifier(random_state=42, max_depth=6), **params)
+    if backend == 'boosting':
+        return GradientBoostingClassifier(**params)
+    if backend == 'hist_boosting':
+        return HistGradientBoostingClassifier(
+            categorical_features=categorical_features, **params
+        )
+    raise ValueError(f"Unknown backend {backend!r}; expected one of {list(BACKENDS)}")
+
+
+def train(backend, X_train, y_train, n_threads=None, preprocessing=None, **params):
+    """Fit ``backend`` on ``X_train`` and return the full preprocessing + model Pipeline.
+
+    The preprocessor and its transformed matrix come from the shared caches in
+    ``features``; ``preprocessing`` overrides the backend's default kind (e.g.
+    ``'grouped'`` for the one-hot models). ``n_threads`` caps the OpenMP
+    threads used by ``hist_boosting`` (all cores by default); bagging
+    parallelism is set with ``n_jobs`` and applies to both fit and predict.
+    """
+    preprocessor = get_preprocessor(X_train, preprocessing or BACKENDS[backend]['preprocessing'])
+    estimator = build_estimator(backend, native_categorical_indices(preprocessor), **params)
+
+    X_train_t = cached_transform(preprocessor, X_train)
+    with threadpool_limits(limits=n_threads, user_api='openmp'):
+        estimator.fit(X_train_t, y_train)
+
+    return Pipeline([
+        ('preprocess', preprocessor),
+        (backend, estimator)
+    ])
+
+
+# ======================
+# Backend comparison
+# ======================
+def compare_backends(X_train, y_train, X_test, y_test, backends=tuple(BACKENDS), path=COMPARISON_PATH):
+    """Fit each backend and record fit time, predict latency and accuracy.
+
+    Fit time covers the estimator only; the preprocessing caches are warmed
+    first. Predict latency is measured end to end through the Pipeline on the
+    whole test frame and reported per 1,000 encounters. Results are written
+    to ``path`` for the dashboard's comparison tab.
+    """
+    rows = []
+    for backend in backends:
+        cached_transform(get_preprocessor(X_train, BACKENDS[backend]['preprocessing']), X_train)
+
+        start = time.perf_counter()
+        model = train(backend, X_train, y_train)
+        fit_seconds = time.perf_counter() - start
+
+        start = time.perf_counter()
+        y_pred = model.predict(X_test)
+        predict_seconds = time.perf_counter() - start
+
+        rows.append({
+            'backend': backend,
+            'model': BACKENDS[backend]['name'],
+            'fit_seconds': fit_seconds,
+            'predict_ms_per_1k': predict_seconds * 1000 / len(X_test) * 1000,
+            'accuracy': accuracy_score(y_test, y_pred),
+        })
+
+    results = pd.DataFrame(rows)
+    if path:
+        os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+        results.to_csv(path, index=False)
+    return results
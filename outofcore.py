@@ -0,0 +1,238 @@
+"""Out-of-core training for encounter files larger than memory.
+
+The in-memory path (``train``) needs the full DataFrame and the full one-hot
+matrix at once. Here the data is streamed in chunks of ``--chunk-rows``
+rows, twice over:
+
+1. **Statistics pass.** :class:`StreamingStats` accumulates value counts
+   per column: numeric medians, means and variances (the numeric columns
+   are small integer counts, so these are exact), the most frequent level
+   of every categorical and the full category vocabularies. The repo's
+   one-hot preprocessor is then set up from those statistics instead of
+   being fit on the whole frame.
+2. **Training passes.** Each chunk is transformed to a sparse float32 block
+   and fed to ``SGDClassifier.partial_fit`` (logistic loss, so the pipeline
+   has ``predict_proba``), for ``--epochs`` passes over the file.
+
+Memory is bounded by one chunk and its transformed block, whatever the file
+size. Patients are split into train/test by a hash of ``patient_nbr``, so
+every encounter of a patient lands on the same side in every chunk.
+
+    python outofcore.py cache/synthetic-10m.parquet --chunk-rows 200000 --epochs 3
+"""
+import argparse
+import os
+import time
+from collections import Counter
+
+import joblib
+import numpy as np
+import pandas as pd
+import pyarrow.parquet as pq
+from sklearn.linear_model import SGDClassifier
+from sklearn.metrics import confusion_matrix
+from sklearn.pipeline import Pipeline
+
+from data import DTYPES, is_parquet
+from features import NUMERIC_COLS, ORDINAL_COLS, build_preprocessor, categorical_columns, split_features
+from predict import CLASS_LABELS
+from splits import GROUP_COL
+
+# ======================
+# Configuration
+# ======================
+OUTOFCORE_MODEL_PATH = os.path.join("models", "outofcore_pipeline.joblib")
+
+CHUNK_ROWS = 100_000
+
+# Averaged SGD: single passes over shuffled chunks are much noisier without it
+SGD_PARAMS = dict(loss='log_loss', alpha=1e-4, average=True, random_state=42)
+
+CLASSES = np.arange(len(CLASS_LABELS))
+
+
+# ======================
+# Chunked input
+# ======================
+def iter_chunks(path, chunk_rows=CHUNK_ROWS, shuffle_seed=None):
+    """Raw encounter DataFrames of at most ``chunk_rows`` rows from Parquet or CSV.
+
+    With ``shuffle_seed``, Parquet row groups are visited in a random order.
+    """
+    if is_parquet(path):
+        parquet = pq.ParquetFile(path)
+        row_groups = list(range(parquet.num_row_groups))
+        if shuffle_seed is not None:
+            np.random.default_rng(shuffle_seed).shuffle(row_groups)
+        for batch in parquet.iter_batches(batch_size=chunk_rows, row_groups=row_groups):
+            yield batch.to_pandas()
+    else:
+        yield from pd.read_csv(path, dtype=DTYPES, chunksize=chunk_rows)
+
+
+def test_patients(df, test_size=0.2):
+    """Rows whose patient falls in the held-out ``round(1 / test_size)``-th hash bucket."""
+    if GROUP_COL not in df.columns:
+        raise ValueError(f"{GROUP_COL!r} is required for a patient-level split")
+    return pd.util.hash_array(df[GROUP_COL].to_numpy()) % round(1 / test_size) == 0
+
+
+def iter_split(path, chunk_rows=CHUNK_ROWS, test_size=0.2, test=False, shuffle_seed=None):
+    """``(X, y)`` chunks of the train (or, with ``test=True``, the test) patients."""
+    for df in iter_chunks(path, chunk_rows, shuffle_seed):
+        keep = test_patients(df, test_size) == test
+        if keep.any():
+            yield split_features(df[keep])
+
+
+# ======================
+# Streaming statistics
+# ======================
+class StreamingStats:
+    """Value counts per column, accumulated chunk by chunk.
+
+    Everything the one-hot preprocessor learns in ``fit`` (medians, means,
+    variances, most frequent levels, vocabularies) is derived from these
+    counts, so memory grows with the number of distinct values, not rows.
+    """
+
+    def __init__(self):
+        self.counts = {}
+        self.n_rows = 0
+
+    def update(self, X):
+        for column in X.columns:
+            counts = X[column].value_counts(dropna=True, sort=False)
+            counts = counts[counts > 0]
+            self.counts.setdefault(column, Counter()).update(dict(zip(counts.index.tolist(), counts.tolist())))
+        self.n_rows += len(X)
+        return self
+
+    def _values(self, column):
+        counts = self.counts[column]
+        values = np.array(sorted(counts))
+        return values, np.array([counts[v] for v in values])
+
+    def n_missing(self, column):
+        return self.n_rows - sum(self.counts[column].values())
+
+    def median(self, column):
+        """Median of the non-missing values, as ``np.median`` computes it."""
+        values, counts = self._values(column)
+        cumulative = np.cumsum(counts)
+        n = cumulative[-1]
+        lower = values[np.searchsorted(cumulative, (n - 1) // 2, side='right')]
+        upper = values[np.searchsorted(cumulative, n // 2, side='right')]
+        return (lower + upper) / 2
+
+    def most_frequent(self, column):
+        """Most frequent value; ties go to the smallest, as in ``SimpleImputer``."""
+        counts = self.counts[column]
+        top = max(counts.values())
+        return min(v for v, c in counts.items() if c == top)
+
+    def imputed_moments(self, column):
+        """Mean and variance after missing values are replaced by the median."""
+        values, counts = self._values(column)
+        median, missing = self.median(column), self.n_missing(column)
+        values = np.append(values, median).astype(float)
+        counts = np.append(counts, missing).astype(float)
+        mean = np.dot(values, counts) / counts.sum()
+        return mean, np.dot((values - mean) ** 2, counts) / counts.sum()
+
+    def vocabulary(self, column):
+        return np.array(sorted(self.counts[column]), dtype=object)
+
+
+def collect_stats(path, chunk_rows=CHUNK_ROWS, test_size=0.2):
+    stats = StreamingStats()
+    for X, _ in iter_split(path, chunk_rows, test_size):
+        stats.update(X)
+    return stats
+
+
+def streaming_preprocessor(stats, sample):
+    """The one-hot preprocessor with every learned parameter taken from ``stats``.
+
+    ``sample`` (any chunk) fixes the input columns; fitting on it builds the
+    transformer structure, then the imputer statistics, scaler moments and
+    encoder categories are replaced with the values for the whole stream.
+    """
+    categorical_cols = categorical_columns(sample)
+    preprocessor = build_preprocessor(categorical_cols)
+    preprocessor.set_params(cat__encoder__categories=[stats.vocabulary(c) for c in categorical_cols])
+    preprocessor.fit(sample)
+
+    num = preprocessor.named_transformers_['num']
+    num.named_steps['imputer'].statistics_ = np.array([stats.median(c) for c in NUMERIC_COLS])
+    moments = np.array([stats.imputed_moments(c) for c in NUMERIC_COLS])
+    scaler = num.named_steps['scaler']
+    scaler.mean_, scaler.var_ = moments[:, 0], moments[:, 1]
+    scaler.scale_ = np.where(moments[:, 1] > 0, np.sqrt(moments[:, 1]), 1.0)
+    scaler.n_samples_seen_ = stats.n_rows
+
+    ordinal = preprocessor.named_transformers_['ord'].named_steps['imputer']
+    ordinal.statistics_ = np.array([stats.most_frequent(c) for c in ORDINAL_COLS], dtype=object)
+    categorical = preprocessor.named_transformers_['cat'].named_steps['imputer']
+    categorical.statistics_ = np.array([stats.most_frequent(c) for c in categorical_cols], dtype=object)
+    return preprocessor
+
+
+# ======================
+# Training
+# ======================
+def train_out_of_core(path, chunk_rows=CHUNK_ROWS, epochs=3, test_size=0.2, **params):
+    """Stream ``path`` to fit the preprocessor and an ``SGDClassifier``; returns the Pipeline."""
+    stats = collect_stats(path, chunk_rows, test_size)
+    sample, _ = next(iter_split(path, chunk_rows, test_size))
+    preprocessor = streaming_preprocessor(stats, sample)
+
+    model = SGDClassifier(**{**SGD_PARAMS, **params})
+    rng = np.random.default_rng(SGD_PARAMS['random_state'])
+    for epoch in range(epochs):
+        for X, y in iter_split(path, chunk_rows, test_size, shuffle_seed=epoch):
+            # Shuffle within the chunk too: files are often ordered by encounter date
+            order = rng.permutation(len(X))
+            model.partial_fit(preprocessor.transform(X.iloc[order]), y.to_numpy()[order], classes=CLASSES)
+
+    return Pipeline([
+        ('preprocess', preprocessor),
+        ('sgd', model)
+    ])
+
+
+def evaluate_out_of_core(pipeline, path, chunk_rows=CHUNK_ROWS, test_size=0.2):
+    """Accuracy and confusion matrix over the held-out patients, accumulated chunk by chunk."""
+    matrix = np.zeros((len(CLASSES), len(CLASSES)), dtype=np.int64)
+    for X, y in iter_split(path, chunk_rows, test_size, test=True):
+        matrix += confusion_matrix(y, pipeline.predict(X), labels=CLASSES)
+    return {
+        'accuracy': np.trace(matrix) / matrix.sum(),
+        'confusion_matrix': matrix.tolist(),
+        'n_test': int(matrix.sum()),
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Train on an encounter file in bounded memory.")
+    parser.add_argument('input', help="encounters in diabetic_data.csv format (.csv or .parquet)")
+    parser.add_argument('--chunk-rows', type=int, default=CHUNK_ROWS)
+    parser.add_argument('--epochs', type=int, default=3, help="passes of partial_fit over the file")
+    parser.add_argument('--alpha', type=float, default=SGD_PARAMS['alpha'])
+    parser.add_argument('--output', default=OUTOFCORE_MODEL_PATH)
+    args = parser.parse_args(argv)
+
+    start = time.perf_counter()
+    pipeline = train_out_of_core(args.input, args.chunk_rows, args.epochs, alpha=args.alpha)
+    fit_seconds = time.perf_counter() - start
+    metrics = evaluate_out_of_core(pipeline, args.input, args.chunk_rows)
+
+    os.makedirs(os.path.dirname(args.output) or '.', exist_ok=True)
+    joblib.dump(pipeline, args.output + '.tmp')
+    os.replace(args.output + '.tmp', args.output)
+    print(f"Trained in {fit_seconds:.1f}s, held-out accuracy {metrics['accuracy']:.4f} "
+          f"on {metrics['n_test']:,} encounters -> {args.output}")
+
+
+if __name__ == '__main__':
+    main()
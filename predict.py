@@ -0,0 +1,93 @@
+"""Prediction engine for the readmission dashboard.
+
+Loads the fitted preprocessing + boosting Pipeline persisted by
+``data_preprocessing&model.ipynb`` and scores whole DataFrames at once.
+"""
+import os
+from functools import lru_cache
+
+import joblib
+import numpy as np
+import pandas as pd
+
+from data import CATEGORY_COLS
+from features import split_features
+
+# ======================
+# Configuration
+# ======================
+MODEL_PATH = os.environ.get("READMISSION_MODEL", os.path.join("models", "boosting_pipeline.joblib"))
+
+CLASS_LABELS = ['NO', '>30', '<30']
+
+
+# ======================
+# Model loading
+# ======================
+@lru_cache(maxsize=None)
+def load_pipeline(path=MODEL_PATH):
+    """Load the fitted Pipeline once per process.
+
+    Numpy arrays are memory-mapped read-only, so processes serving the same
+    file share them through the page cache.
+    """
+    return joblib.load(path, mmap_mode='r')
+
+
+def _code_string(value):
+    if isinstance(value, (bool, np.bool_)) or not isinstance(value, (int, float, np.integer, np.floating)):
+        return value
+    if value != value:
+        return value
+    return str(int(value)) if float(value).is_integer() else str(value)
+
+
+def as_codes(df):
+    """Code columns (ICD-9 diagnoses, medications, ...) as strings, as they are in training.
+
+    Untyped CSV readers and JSON turn an all-numeric ``diag_1`` into numbers
+    (``414`` or ``414.0``), which the one-hot encoder would treat as unknown.
+    """
+    df = df.copy()
+    for column in [c for c in CATEGORY_COLS if c in df.columns]:
+        if pd.api.types.infer_dtype(df[column], skipna=True) not in ('string', 'empty', 'categorical'):
+            df[column] = df[column].map(_code_string)
+    return df
+
+
+def prepare_features(df, pipeline):
+    """Align an encounter DataFrame to the columns the pipeline was fit on."""
+    X, _ = split_features(as_codes(df))
+    expected = getattr(pipeline, 'feature_names_in_', None)
+    if expected is not None:
+        missing = [c for c in expected if c not in X.columns]
+        if missing:
+            raise ValueError(f"Input is missing required columns: {missing}")
+        X = X[list(expected)]
+    return X
+
+
+# ======================
+# Batch scoring
+# ======================
+def predict_batch(df, pipeline=None):
+    """Score every encounter in ``df`` with a single vectorized call.
+
+    Returns a DataFrame indexed like ``df`` with the predicted class code,
+    its label and one probability column per class.
+    """
+    if pipeline is None:
+        pipeline = load_pipeline()
+    X = prepare_features(df, pipeline)
+
+    proba = pipeline.predict_proba(X)
+    classes = np.asarray(pipeline.classes_)
+    pred = classes[proba.argmax(axis=1)]
+
+    result = pd.DataFrame(
+        proba, index=df.index,
+        columns=[f"proba_{CLASS_LABELS[c]}" for c in classes]
+    )
+    result.insert(0, 'prediction', pred)
+    result.insert(1, 'label', np.asarray(CLASS_LABELS, dtype=object)[pred])
+    return result
@@ -0,0 +1,142 @@
+"""Versioned store of trained model artifacts.
+
+Each registered model gets a directory ``<registry>/<name>/<version>/``
+holding the fitted pipeline, metrics JSON, the confusion matrix and a
+manifest with the training data fingerprint::
+
+    models/registry/boosting/0003/
+        pipeline.joblib  metrics.json  confusion_matrix.npy  manifest.json
+
+The preprocessor is only stored inside the pipeline;
+:func:`load_preprocessor` returns that first step.
+
+Artifacts are written uncompressed so :func:`load_model` can open them with
+``mmap_mode='r'``: plain numpy arrays in the pipeline (e.g. the
+``hist_boosting`` predictor nodes) are then mapped from the page cache and
+shared by every process serving the same version instead of copied into
+each one. ``sklearn.tree.Tree`` copies its node arrays on unpickling, so the
+bagging and gradient boosting trees still get a private copy per process.
+"""
+import json
+import os
+import shutil
+from datetime import datetime, timezone
+
+import joblib
+import numpy as np
+import sklearn
+
+from features import frame_fingerprint
+from predict import MODEL_PATH
+
+# ======================
+# Configuration
+# ======================
+REGISTRY_DIR = os.environ.get("READMISSION_REGISTRY", os.path.join("models", "registry"))
+
+PIPELINE_FILE = 'pipeline.joblib'
+METRICS_FILE = 'metrics.json'
+CONFUSION_FILE = 'confusion_matrix.npy'
+MANIFEST_FILE = 'manifest.json'
+
+
+# ======================
+# Versions
+# ======================
+def versions(name, registry_dir=REGISTRY_DIR):
+    """Registered versions of ``name``, oldest first."""
+    directory = os.path.join(registry_dir, name)
+    if not os.path.isdir(directory):
+        return []
+    return sorted(int(v) for v in os.listdir(directory) if v.isdigit())
+
+
+def latest_version(name, registry_dir=REGISTRY_DIR):
+    found = versions(name, registry_dir)
+    if not found:
+        raise FileNotFoundError(f"No versions of {name!r} registered under {registry_dir}")
+    return found[-1]
+
+
+def version_dir(name, version=None, registry_dir=REGISTRY_DIR):
+    """Directory of ``version`` (the latest when ``None``)."""
+    if version is None:
+        version = latest_version(name, registry_dir)
+    return os.path.join(registry_dir, name, f"{version:04d}")
+
+
+# ======================
+# Writing
+# ======================
+def register(name, pipeline, X_train, metrics=None, confusion=None, registry_dir=REGISTRY_DIR):
+    """Store ``pipeline`` as the next version of ``name`` and return the version number.
+
+    ``metrics`` is any JSON-serialisable dict and ``confusion`` a confusion
+    matrix; both are optional. The version directory is written under a
+    temporary name and renamed into place, so readers never see a partial
+    version.
+    """
+    version = (versions(name, registry_dir) or [0])[-1] + 1
+    target = version_dir(name, version, registry_dir)
+    staging = target + '.tmp'
+    shutil.rmtree(staging, ignore_errors=True)
+    os.makedirs(staging)
+
+    joblib.dump(pipeline, os.path.join(staging, PIPELINE_FILE))
+    if metrics is not None:
+        with open(os.path.join(staging, METRICS_FILE), 'w') as fh:
+            json.dump(metrics, fh, indent=2, default=float)
+    if confusion is not None:
+        np.save(os.path.join(staging, CONFUSION_FILE), np.asarray(confusion))
+
+    manifest = {
+        'name': name,
+        'version': version,
+        'created': datetime.now(timezone.utc).isoformat(timespec='seconds'),
+        'backend': pipeline.steps[-1][0],
+        'data_fingerprint': frame_fingerprint(X_train),
+        'n_train': len(X_train),
+        'features': list(X_train.columns),
+        'sklearn_version': sklearn.__version__,
+    }
+    with open(os.path.join(staging, MANIFEST_FILE), 'w') as fh:
+        json.dump(manifest, fh, indent=2)
+
+    os.replace(staging, target)
+    return version
+
+
+def publish(name, version=None, path=None, registry_dir=REGISTRY_DIR):
+    """Copy a registered pipeline to the serving path read by ``predict`` and ``score``."""
+    path = path or MODEL_PATH
+    os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+    shutil.copyfile(os.path.join(version_dir(name, version, registry_dir), PIPELINE_FILE), path + '.tmp')
+    os.replace(path + '.tmp', path)
+    return path
+
+
+# ======================
+# Reading
+# ======================
+def load_model(name, version=None, mmap_mode='r', registry_dir=REGISTRY_DIR):
+    """Fitted pipeline of ``version`` (the latest when ``None``), memory-mapped by default."""
+    return joblib.load(os.path.join(version_dir(name, version, registry_dir), PIPELINE_FILE), mmap_mode=mmap_mode)
+
+
+def load_preprocessor(name, version=None, mmap_mode='r', registry_dir=REGISTRY_DIR):
+    """Fitted preprocessing step of the registered pipeline."""
+    return load_model(name, version, mmap_mode, registry_dir)[0]
+
+
+def load_manifest(name, version=None, registry_dir=REGISTRY_DIR):
+    with open(os.path.join(version_dir(name, version, registry_dir), MANIFEST_FILE)) as fh:
+        return json.load(fh)
+
+
+def load_metrics(name, version=None, registry_dir=REGISTRY_DIR):
+    with open(os.path.join(version_dir(name, version, registry_dir), METRICS_FILE)) as fh:
+        return json.load(fh)
+
+
+def load_confusion(name, version=None, registry_dir=REGISTRY_DIR):
+    return np.load(os.path.join(version_dir(name, version, registry_dir), CONFUSION_FILE))
@@ -0,0 +1,119 @@
+"""Incremental retraining of the persisted pipeline on a new batch of encounters.
+
+Instead of refitting on the full history, the fitted model is extended with
+trees trained on the new batch only: Gradient Boosting gets a new set of
+boosting stages whose ``init`` is the current model (so they start from its
+predictions) and ``BaggingClassifier`` appends estimators to its ensemble
+with ``warm_start``. Codes that the preprocessor has never seen get their own
+one-hot columns, appended after the existing ones; the old trees only ever
+see the columns they were trained on, so no tree internals are rewritten.
+
+    python retrain.py new_encounters.csv --n-estimators 25
+"""
+import argparse
+import copy
+import os
+import time
+
+import joblib
+import numpy as np
+import pandas as pd
+from sklearn.base import BaseEstimator, ClassifierMixin
+from sklearn.ensemble import GradientBoostingClassifier
+from sklearn.pipeline import Pipeline
+
+from data import is_parquet, read_raw
+from features import ExtendedVocabulary, split_features
+from predict import MODEL_PATH
+
+WARM_START_BACKENDS = ('boosting', 'bagging')
+
+
+class FrozenModel(ClassifierMixin, BaseEstimator):
+    """A fitted classifier restricted to the first ``n_columns`` input columns.
+
+    Used as the ``init`` of new boosting stages: ``fit`` leaves the wrapped
+    model as it is, and ``predict_proba`` passes it only the columns it was
+    trained on, while the new stages see the appended vocabulary columns too.
+    """
+
+    def __init__(self, estimator, n_columns):
+        self.estimator = estimator
+        self.n_columns = n_columns
+
+    def fit(self, X, y, sample_weight=None):
+        self.classes_ = self.estimator.classes_
+        return self
+
+    def predict_proba(self, X):
+        return self.estimator.predict_proba(X[:, :self.n_columns])
+
+    def predict(self, X):
+        return self.estimator.predict(X[:, :self.n_columns])
+
+
+def retrain(pipeline, X_new, y_new, n_estimators=25, min_count=5):
+    """Pipeline extended with ``n_estimators`` trees fitted on ``(X_new, y_new)``.
+
+    ``pipeline`` is left untouched. Codes appearing at least ``min_count``
+    times in ``X_new`` that the preprocessor has no column for are added to
+    the vocabulary.
+    """
+    (_, preprocessor), (backend, estimator) = pipeline.steps
+    if backend not in WARM_START_BACKENDS:
+        raise ValueError(f"Incremental retraining supports {WARM_START_BACKENDS}, not {backend!r}")
+
+    missing = np.setdiff1d(estimator.classes_, np.unique(y_new))
+    if len(missing):
+        raise ValueError(f"New batch has no encounters of class(es) {missing.tolist()}; "
+                         f"every class is needed to extend the model")
+
+    preprocessor = ExtendedVocabulary(preprocessor, min_count=min_count).fit(X_new)
+    X_new_t = preprocessor.transform(X_new)
+
+    estimator = copy.deepcopy(estimator)
+    if backend == 'boosting':
+        # The new stages fit the residuals of the current model's predictions, like warm_start,
+        # and the current model keeps reading only its own columns
+        params = {**estimator.get_params(deep=False), 'warm_start': False, 'n_estimators': n_estimators}
+        params['init'] = FrozenModel(estimator, estimator.n_features_in_)
+        estimator = GradientBoostingClassifier(**params)
+    else:
+        # Bagging keeps each estimator's feature indices, so old members ignore the new columns
+        estimator.set_params(warm_start=True, n_estimators=len(estimator.estimators_) + n_estimators)
+    estimator.fit(X_new_t, y_new)
+
+    return Pipeline([
+        ('preprocess', preprocessor),
+        (backend, estimator)
+    ])
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Extend the persisted model with trees fit on new encounters.")
+    parser.add_argument('input', help="labelled encounters in diabetic_data.csv format (.csv or .parquet)")
+    parser.add_argument('--model', default=MODEL_PATH, help="pipeline to extend (default: %(default)s)")
+    parser.add_argument('--output', default=None, help="where to save the result (default: overwrite --model)")
+    parser.add_argument('--n-estimators', type=int, default=25, help="trees to add (default: %(default)s)")
+    parser.add_argument('--min-count', type=int, default=5,
+                        help="occurrences before an unseen code gets a column (default: %(default)s)")
+    args = parser.parse_args(argv)
+
+    df = pd.read_parquet(args.input) if is_parquet(args.input) else read_raw(args.input)
+    X_new, y_new = split_features(df)
+    pipeline = joblib.load(args.model)
+
+    start = time.perf_counter()
+    updated = retrain(pipeline, X_new, y_new, args.n_estimators, args.min_count)
+    elapsed = time.perf_counter() - start
+
+    output = args.output or args.model
+    os.makedirs(os.path.dirname(output) or '.', exist_ok=True)
+    joblib.dump(updated, output + '.tmp')
+    os.replace(output + '.tmp', output)
+    print(f"Added {args.n_estimators} trees and {updated[0].n_new_columns_} new code columns "
+          f"from {len(X_new):,} encounters in {elapsed:.1f}s -> {output}")
+
+
+if __name__ == '__main__':
+    main()
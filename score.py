@@ -0,0 +1,262 @@
+"""Streaming batch scoring of large encounter extracts.
+
+Reads a CSV or Parquet file in bounded-size chunks, scores each chunk with
+the persisted preprocessing + boosting pipeline and appends the predictions
+to the output file, so memory stays constant regardless of input size.
+
+With ``--workers N`` the file is split into shards (byte ranges of a CSV,
+small Parquet row groups bundled together or ``--chunk-size`` slices of
+large ones) that are read and scored in a process pool. Each worker loads
+the model once and reads its own shard from disk, so neither the model nor
+the input rows are pickled per task. At most ``2 * workers`` shards are in
+flight at once, so finished results do not pile up behind a slow one.
+
+    python score.py encounters.csv predictions.csv --chunk-size 50000
+    python score.py encounters.parquet predictions.parquet --workers 16
+"""
+import argparse
+import collections
+import io
+import itertools
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+from threadpoolctl import threadpool_limits
+
+from data import DTYPES, ID_COLS, is_parquet
+from predict import MODEL_PATH, load_pipeline, predict_batch
+
+DEFAULT_CHUNK_SIZE = 50_000
+DEFAULT_SHARD_BYTES = 32 * 1024 * 1024
+
+
+# ======================
+# Input / output
+# ======================
+def iter_chunks(path, chunk_size=DEFAULT_CHUNK_SIZE):
+    """Yield DataFrames of at most ``chunk_size`` encounters."""
+    if is_parquet(path):
+        for batch in pq.ParquetFile(path).iter_batches(batch_size=chunk_size):
+            yield batch.to_pandas()
+    else:
+        with pd.read_csv(path, dtype=DTYPES, chunksize=chunk_size) as reader:
+            yield from reader
+
+
+class PredictionWriter:
+    """Append prediction chunks to a CSV or Parquet file."""
+
+    def __init__(self, path):
+        self.path = path
+        self._parquet = None
+        self._started = False
+
+    def write(self, frame):
+        if is_parquet(self.path):
+            table = pa.Table.from_pandas(frame, preserve_index=False)
+            if self._parquet is None:
+                self._parquet = pq.ParquetWriter(self.path, table.schema)
+            self._parquet.write_table(table)
+        else:
+            frame.to_csv(self.path, mode='a' if self._started else 'w', header=not self._started, index=False)
+        self._started = True
+
+    def close(self):
+        if self._parquet is not None:
+            self._parquet.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+# ======================
+# Scoring
+# ======================
+def score_chunk(chunk, pipeline):
+    """Predictions for one chunk, prefixed with its identifier columns."""
+    scores = predict_batch(chunk, pipeline)
+    ids = [c for c in ID_COLS if c in chunk.columns]
+    return pd.concat([chunk[ids], scores], axis=1) if ids else scores
+
+
+def score_file(input_path, output_path, model_path=MODEL_PATH, chunk_size=DEFAULT_CHUNK_SIZE, log=sys.stderr):
+    """Stream ``input_path`` through the model into ``output_path``.
+
+    Returns a dict with the row count, elapsed seconds and rows per second.
+    """
+    pipeline = load_pipeline(model_path)
+
+    rows = 0
+    start = time.perf_counter()
+    with PredictionWriter(output_path) as writer:
+        for chunk in iter_chunks(input_path, chunk_size):
+            writer.write(score_chunk(chunk, pipeline))
+            rows += len(chunk)
+            if log:
+                elapsed = time.perf_counter() - start
+                print(f"scored {rows:,} rows ({rows / elapsed:,.0f} rows/s)", file=log)
+    elapsed = time.perf_counter() - start
+
+    return {'rows': rows, 'seconds': elapsed, 'rows_per_second': rows / elapsed if elapsed else 0.0}
+
+
+# ======================
+# Sharded scoring
+# ======================
+def csv_shards(path, shard_bytes=DEFAULT_SHARD_BYTES):
+    """Byte ranges of roughly ``shard_bytes`` that start and end on line boundaries.
+
+    Assumes no quoted newlines inside fields, which holds for the
+    diabetic_data.csv format.
+    """
+    size = os.path.getsize(path)
+    with open(path, 'rb') as fh:
+        fh.readline()
+        start = fh.tell()
+        while start < size:
+            fh.seek(min(start + shard_bytes, size))
+            fh.readline()
+            end = min(fh.tell(), size)
+            yield ('csv', start, end)
+            start = end
+
+
+def parquet_shards(path, chunk_size=DEFAULT_CHUNK_SIZE):
+    """Shards of about ``chunk_size`` rows as ``('parquet', row_groups, batch_index)``.
+
+    Consecutive small row groups are bundled until they reach ``chunk_size``
+    rows (``batch_index`` is ``None``: read them whole). A row group larger
+    than ``chunk_size``, which is common for files written by pyarrow or
+    pandas, is split into one shard per ``chunk_size`` batch.
+    """
+    metadata = pq.ParquetFile(path).metadata
+    groups, rows = [], 0
+    for i in range(metadata.num_row_groups):
+        group_rows = metadata.row_group(i).num_rows
+        if group_rows > chunk_size:
+            if rows:
+                yield ('parquet', tuple(groups), None)
+            groups, rows = [], 0
+            for batch_index in range(-(-group_rows // chunk_size)):
+                yield ('parquet', (i,), batch_index)
+            continue
+        groups.append(i)
+        rows += group_rows
+        if rows >= chunk_size:
+            yield ('parquet', tuple(groups), None)
+            groups, rows = [], 0
+    if rows:
+        yield ('parquet', tuple(groups), None)
+
+
+def read_shard(path, shard, chunk_size=DEFAULT_CHUNK_SIZE):
+    """Load one shard produced by :func:`csv_shards` or :func:`parquet_shards`.
+
+    ``chunk_size`` must be the value the Parquet shards were made with.
+    """
+    if shard[0] == 'parquet':
+        _, groups, batch_index = shard
+        parquet = pq.ParquetFile(path)
+        if batch_index is None:
+            return parquet.read_row_groups(list(groups)).to_pandas()
+        # Only the group's earlier batches are decoded on the way; the rest is never read
+        batches = parquet.iter_batches(batch_size=chunk_size, row_groups=list(groups))
+        return next(itertools.islice(batches, batch_index, None)).to_pandas()
+
+    _, start, end = shard
+    with open(path, 'rb') as fh:
+        header = fh.readline()
+        fh.seek(start)
+        body = fh.read(end - start)
+    return pd.read_csv(io.BytesIO(header + body), dtype=DTYPES)
+
+
+_worker_limits = None
+
+
+def _init_worker(model_path):
+    # One BLAS/OpenMP thread per process; parallelism comes from the pool
+    global _worker_limits
+    _worker_limits = threadpool_limits(limits=1)
+    load_pipeline(model_path)
+
+
+def _score_shard(task):
+    path, shard, model_path, chunk_size = task
+    shard_rows = read_shard(path, shard, chunk_size)
+    pipeline = load_pipeline(model_path)
+    # CSV shards and bundled row groups can exceed chunk_size; score them chunk by chunk
+    return pd.concat([
+        score_chunk(shard_rows.iloc[start:start + chunk_size], pipeline)
+        for start in range(0, len(shard_rows), chunk_size)
+    ], ignore_index=True)
+
+
+def score_file_parallel(input_path, output_path, model_path=MODEL_PATH, workers=None,
+                        chunk_size=DEFAULT_CHUNK_SIZE, shard_bytes=DEFAULT_SHARD_BYTES, log=sys.stderr):
+    """Score ``input_path`` shard by shard in a pool of ``workers`` processes.
+
+    Results are written in input order, with at most ``2 * workers`` shards
+    submitted ahead of the writer. Returns the same stats dict as
+    :func:`score_file`.
+    """
+    workers = workers or os.cpu_count() or 1
+    if is_parquet(input_path):
+        shards = parquet_shards(input_path, chunk_size)
+    else:
+        shards = csv_shards(input_path, shard_bytes)
+    tasks = ((input_path, shard, model_path, chunk_size) for shard in shards)
+
+    rows = 0
+    start = time.perf_counter()
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker, initargs=(model_path,)) as pool, \
+            PredictionWriter(output_path) as writer:
+        in_flight = collections.deque(pool.submit(_score_shard, task) for task in itertools.islice(tasks, 2 * workers))
+        while in_flight:
+            scores = in_flight.popleft().result()
+            for task in itertools.islice(tasks, 1):
+                in_flight.append(pool.submit(_score_shard, task))
+            writer.write(scores)
+            rows += len(scores)
+            if log:
+                elapsed = time.perf_counter() - start
+                print(f"scored {rows:,} rows ({rows / elapsed:,.0f} rows/s)", file=log)
+    elapsed = time.perf_counter() - start
+
+    return {'rows': rows, 'seconds': elapsed, 'rows_per_second': rows / elapsed if elapsed else 0.0}
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Score an encounter extract in bounded-size chunks.")
+    parser.add_argument('input', help="encounters in diabetic_data.csv format (.csv or .parquet)")
+    parser.add_argument('output', help="predictions file (.csv or .parquet)")
+    parser.add_argument('--model', default=MODEL_PATH, help="persisted pipeline (default: %(default)s)")
+    parser.add_argument('--chunk-size', type=int, default=DEFAULT_CHUNK_SIZE,
+                        help="encounters per chunk (default: %(default)s)")
+    parser.add_argument('--workers', type=int, default=1,
+                        help="scoring processes; above 1 the input is sharded (default: %(default)s)")
+    parser.add_argument('--shard-bytes', type=int, default=DEFAULT_SHARD_BYTES,
+                        help="approximate CSV shard size in bytes (default: %(default)s)")
+    parser.add_argument('--quiet', action='store_true', help="only print the final throughput report")
+    args = parser.parse_args(argv)
+
+    log = None if args.quiet else sys.stderr
+    if args.workers > 1:
+        stats = score_file_parallel(args.input, args.output, args.model, args.workers,
+                                    args.chunk_size, args.shard_bytes, log=log)
+    else:
+        stats = score_file(args.input, args.output, args.model, args.chunk_size, log=log)
+    print(f"Scored {stats['rows']:,} encounters in {stats['seconds']:.1f}s "
+          f"({stats['rows_per_second']:,.0f} rows/s) -> {args.output}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,316 @@
+"""Asynchronous HTTP scoring service with micro-batching.
+
+A small HTTP/1.1 server on ``asyncio`` streams (no web framework needed).
+Concurrent requests are queued and coalesced into micro-batches of at most
+``--max-batch`` encounters, waiting no longer than ``--max-wait-ms`` for a
+batch to fill, and each batch is scored with one vectorized
+``predict_batch`` call in a worker thread so the event loop keeps accepting
+requests.
+If a batch fails, its requests are re-scored one at a time, so a malformed
+encounter only fails the request that sent it.
+
+    python service.py --port 8000 --max-batch 256 --max-wait-ms 5
+
+Endpoints:
+
+* ``POST /predict``: one encounter (JSON object) or a list of them, in
+  ``diabetic_data.csv`` columns; returns one prediction per encounter.
+* ``GET /metrics``: request, batch and latency counters.
+* ``GET /health``
+
+Requests that cannot be parsed get 400 and bodies over ``--max-body-bytes``
+get 413; either way the connection is then closed.
+"""
+import argparse
+import asyncio
+import collections
+import json
+import time
+
+import numpy as np
+import pandas as pd
+
+from predict import MODEL_PATH, load_pipeline, predict_batch
+
+DEFAULT_MAX_BATCH = 256
+DEFAULT_MAX_WAIT_MS = 5.0
+
+LATENCY_WINDOW = 10_000
+
+MAX_BODY_BYTES = 16 * 1024 * 1024
+
+REASONS = {200: 'OK', 400: 'Bad Request', 404: 'Not Found', 405: 'Method Not Allowed',
+           413: 'Payload Too Large', 500: 'Internal Server Error'}
+
+
+# ======================
+# Counters
+# ======================
+class Metrics:
+    """Throughput and latency counters; latency percentiles cover the last requests only."""
+
+    def __init__(self):
+        self.started = time.monotonic()
+        self.requests = 0
+        self.errors = 0
+        self.encounters = 0
+        self.batches = 0
+        self.latencies = collections.deque(maxlen=LATENCY_WINDOW)
+        self.batch_sizes = collections.deque(maxlen=LATENCY_WINDOW)
+
+    def snapshot(self):
+        uptime = time.monotonic() - self.started
+        latencies = np.asarray(self.latencies) * 1000
+        return {
+            'uptime_seconds': uptime,
+            'requests': self.requests,
+            'errors': self.errors,
+            'encounters': self.encounters,
+            'batches': self.batches,
+            'mean_batch_size': float(np.mean(self.batch_sizes)) if self.batch_sizes else 0.0,
+            'requests_per_second': self.requests / uptime if uptime else 0.0,
+            'latency_ms': {f"p{q}": float(np.percentile(latencies, q)) for q in (50, 95, 99)}
+            if len(latencies) else {},
+        }
+
+
+# ======================
+# Micro-batching
+# ======================
+def _settle(future, result=None, exception=None):
+    """Resolve ``future`` unless its request has already gone away (e.g. cancelled)."""
+    if future.done():
+        return
+    if exception is not None:
+        future.set_exception(exception)
+    else:
+        future.set_result(result)
+
+
+class MicroBatcher:
+    """Coalesce concurrent scoring requests into batches for ``predict_batch``."""
+
+    def __init__(self, pipeline, metrics, max_batch=DEFAULT_MAX_BATCH, max_wait_ms=DEFAULT_MAX_WAIT_MS):
+        self.pipeline = pipeline
+        self.metrics = metrics
+        self.max_batch = max_batch
+        self.max_wait = max_wait_ms / 1000
+        self.queue = asyncio.Queue()
+
+    async def score(self, records):
+        """Predictions for ``records``, scored together with whatever else is queued."""
+        future = asyncio.get_running_loop().create_future()
+        await self.queue.put((records, future))
+        return await future
+
+    async def run(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            pending = await self._collect(loop)
+            try:
+                await self._score_pending(loop, pending)
+            except Exception as exc:
+                # Whatever goes wrong with one batch, the batcher keeps serving
+                for _, future in pending:
+                    _settle(future, exception=exc)
+
+    async def _collect(self, loop):
+        """The next queued request plus whatever arrives within ``max_wait``, up to ``max_batch`` encounters."""
+        pending = [await self.queue.get()]
+        size = len(pending[0][0])
+        deadline = loop.time() + self.max_wait
+        while size < self.max_batch:
+            timeout = deadline - loop.time()
+            if timeout <= 0:
+                break
+            try:
+                item = await asyncio.wait_for(self.queue.get(), timeout)
+            except asyncio.TimeoutError:
+                break
+            pending.append(item)
+            size += len(item[0])
+        return pending
+
+    async def _score_pending(self, loop, pending):
+        records = [record for batch, _ in pending for record in batch]
+        try:
+            scores = await loop.run_in_executor(None, self._predict, records)
+        except Exception as exc:
+            if len(pending) == 1:
+                _settle(pending[0][1], exception=exc)
+                return
+            # One malformed request must not fail the others: score each request on its own
+            for batch, future in pending:
+                try:
+                    _settle(future, await loop.run_in_executor(None, self._predict, batch))
+                except Exception as exc:
+                    _settle(future, exception=exc)
+            return
+
+        self.metrics.batches += 1
+        self.metrics.batch_sizes.append(len(records))
+        start = 0
+        for batch, future in pending:
+            _settle(future, scores[start:start + len(batch)])
+            start += len(batch)
+
+    def _predict(self, records):
+        scores = predict_batch(pd.DataFrame.from_records(records), self.pipeline)
+        return scores.to_dict('records')
+
+
+# ======================
+# HTTP
+# ======================
+class BadRequest(Exception):
+    """A request that cannot be served; ``status`` is the HTTP status to answer with."""
+
+    def __init__(self, status, message):
+        super().__init__(message)
+        self.status = status
+
+
+class ScoringService:
+    def __init__(self, pipeline, max_batch=DEFAULT_MAX_BATCH, max_wait_ms=DEFAULT_MAX_WAIT_MS,
+                 max_body_bytes=MAX_BODY_BYTES):
+        self.metrics = Metrics()
+        self.max_body_bytes = max_body_bytes
+        self.batcher = MicroBatcher(pipeline, self.metrics, max_batch, max_wait_ms)
+        self.required = list(getattr(pipeline, 'feature_names_in_', []))
+
+    async def handle_predict(self, body):
+        payload = json.loads(body)
+        records = payload if isinstance(payload, list) else [payload]
+        if not records or not all(isinstance(r, dict) for r in records):
+            return 400, {'error': "expected an encounter object or a list of them"}
+        missing = sorted({c for r in records for c in self.required if c not in r})
+        if missing:
+            return 400, {'error': f"missing columns: {missing}"}
+
+        predictions = await self.batcher.score(records)
+        self.metrics.encounters += len(records)
+        return 200, predictions if isinstance(payload, list) else predictions[0]
+
+    async def route(self, method, path, body):
+        if path == '/predict':
+            if method != 'POST':
+                return 405, {'error': "use POST"}
+            return await self.handle_predict(body)
+        if path == '/metrics':
+            return 200, self.metrics.snapshot()
+        if path == '/health':
+            return 200, {'status': 'ok'}
+        return 404, {'error': f"no route {path}"}
+
+    async def read_request(self, reader):
+        """``(method, path, headers, body)`` of the next request, ``None`` at end of stream.
+
+        Raises :class:`BadRequest` for anything that cannot be parsed or is too large.
+        """
+        request_line = await self._readline(reader)
+        if not request_line:
+            return None
+        parts = request_line.decode('latin-1').split(' ', 2)
+        if len(parts) != 3:
+            raise BadRequest(400, "malformed request line")
+        method, path, _ = parts
+        headers = {}
+        while (line := await self._readline(reader)) not in (b'\r\n', b'\n', b''):
+            name, _, value = line.decode('latin-1').partition(':')
+            headers[name.strip().lower()] = value.strip()
+        try:
+            length = int(headers.get('content-length', 0))
+        except ValueError:
+            raise BadRequest(400, "invalid Content-Length") from None
+        if length < 0:
+            raise BadRequest(400, "invalid Content-Length")
+        if length > self.max_body_bytes:
+            raise BadRequest(413, f"body larger than {self.max_body_bytes:,} bytes")
+        return method, path, headers, await reader.readexactly(length)
+
+    @staticmethod
+    async def _readline(reader):
+        try:
+            return await reader.readline()
+        except ValueError:
+            # StreamReader's line limit (64 KiB) was exceeded
+            raise BadRequest(400, "request line or header too long") from None
+
+    def write_response(self, writer, status, result, keep_alive):
+        payload = json.dumps(result, default=float).encode()
+        writer.write(
+            f"HTTP/1.1 {status} {REASONS[status]}\r\n"
+            f"Content-Type: application/json\r\nContent-Length: {len(payload)}\r\n"
+            f"Connection: {'keep-alive' if keep_alive else 'close'}\r\n\r\n".encode() + payload
+        )
+
+    async def handle_connection(self, reader, writer):
+        try:
+            while True:
+                try:
+                    request = await self.read_request(reader)
+                except BadRequest as exc:
+                    # The rest of the stream can't be trusted: answer and hang up
+                    self.metrics.requests += 1
+                    self.metrics.errors += 1
+                    self.write_response(writer, exc.status, {'error': str(exc)}, keep_alive=False)
+                    await writer.drain()
+                    break
+                if request is None:
+                    break
+                method, path, headers, body = request
+
+                start = time.perf_counter()
+                self.metrics.requests += 1
+                try:
+                    status, result = await self.route(method, path, body)
+                except (ValueError, KeyError) as exc:
+                    status, result = 400, {'error': str(exc)}
+                except Exception as exc:
+                    status, result = 500, {'error': str(exc)}
+                if status >= 400:
+                    self.metrics.errors += 1
+                elif path == '/predict':
+                    self.metrics.latencies.append(time.perf_counter() - start)
+
+                keep_alive = headers.get('connection', '').lower() != 'close'
+                self.write_response(writer, status, result, keep_alive)
+                await writer.drain()
+                if not keep_alive:
+                    break
+        except (asyncio.IncompleteReadError, ConnectionResetError):
+            pass
+        finally:
+            writer.close()
+
+    async def serve(self, host='127.0.0.1', port=8000):
+        server = await asyncio.start_server(self.handle_connection, host, port)
+        batcher = asyncio.create_task(self.batcher.run())
+        print(f"Scoring service listening on http://{host}:{port} "
+              f"(max batch {self.batcher.max_batch}, max wait {self.batcher.max_wait * 1000:g} ms)")
+        try:
+            async with server:
+                await server.serve_forever()
+        finally:
+            batcher.cancel()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Micro-batching HTTP scoring service.")
+    parser.add_argument('--model', default=MODEL_PATH, help="persisted pipeline (default: %(default)s)")
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8000)
+    parser.add_argument('--max-batch', type=int, default=DEFAULT_MAX_BATCH,
+                        help="encounters per scoring call (default: %(default)s)")
+    parser.add_argument('--max-wait-ms', type=float, default=DEFAULT_MAX_WAIT_MS,
+                        help="longest wait for a batch to fill (default: %(default)s)")
+    parser.add_argument('--max-body-bytes', type=int, default=MAX_BODY_BYTES,
+                        help="larger request bodies get 413 (default: %(default)s)")
+    args = parser.parse_args(argv)
+
+    service = ScoringService(load_pipeline(args.model), args.max_batch, args.max_wait_ms, args.max_body_bytes)
+    asyncio.run(service.serve(args.host, args.port))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,108 @@
+"""Patient-level train/test splits and cross-validation folds.
+
+A patient can have many encounters; splitting encounters at random puts
+the same patient's visits on both sides of the split and inflates test
+scores. Splits here are grouped on ``patient_nbr`` (every patient's
+encounters are on one side) and stratified on the readmission class.
+
+Fold assignments are computed once per (patients, labels, n_splits, seed)
+and stored as int32 index arrays under ``cache/splits/``, so every model,
+evaluation and tuning run reuses the same folds without recomputing them.
+"""
+import hashlib
+import os
+from functools import lru_cache
+
+import numpy as np
+from sklearn.model_selection import StratifiedGroupKFold
+
+from features import split_features
+
+# ======================
+# Configuration
+# ======================
+SPLIT_DIR = os.environ.get("READMISSION_SPLIT_DIR", os.path.join("cache", "splits"))
+
+GROUP_COL = 'patient_nbr'
+
+
+# ======================
+# Folds
+# ======================
+def folds_key(groups, y, n_splits, random_state):
+    digest = hashlib.sha256()
+    digest.update(np.ascontiguousarray(groups, dtype=np.int64).tobytes())
+    digest.update(np.ascontiguousarray(y, dtype=np.int64).tobytes())
+    digest.update(f"{n_splits}-{random_state}".encode())
+    return digest.hexdigest()[:16]
+
+
+@lru_cache(maxsize=32)
+def _load_folds(path, n_splits):
+    with np.load(path) as stored:
+        return tuple((stored[f"train_{i}"], stored[f"test_{i}"]) for i in range(n_splits))
+
+
+def get_folds(groups, y, n_splits=5, random_state=42, directory=SPLIT_DIR):
+    """``((train_idx, test_idx), ...)`` for a stratified, patient-grouped K-fold.
+
+    Indices are int32 row positions. Computed with ``StratifiedGroupKFold``
+    on first use and loaded from disk afterwards.
+    """
+    groups, y = np.asarray(groups), np.asarray(y)
+    path = os.path.join(directory, f"folds{n_splits}-{folds_key(groups, y, n_splits, random_state)}.npz")
+    if not os.path.exists(path):
+        splitter = StratifiedGroupKFold(n_splits=n_splits, shuffle=True, random_state=random_state)
+        arrays = {}
+        for i, (train_idx, test_idx) in enumerate(splitter.split(np.empty((len(y), 0)), y, groups)):
+            arrays[f"train_{i}"] = train_idx.astype(np.int32)
+            arrays[f"test_{i}"] = test_idx.astype(np.int32)
+        os.makedirs(directory, exist_ok=True)
+        np.savez(path + '.tmp.npz', **arrays)
+        os.replace(path + '.tmp.npz', path)
+    return _load_folds(path, n_splits)
+
+
+class PatientFolds:
+    """Cross-validation splitter that serves :func:`get_folds`.
+
+    Pass as ``cv=`` to any scikit-learn search or ``cross_validate`` and
+    supply ``groups=patient_nbr`` to ``fit``. The folds are computed once on
+    the full rows; successive halving subsamples the train and test indices
+    inside each of these folds, so no patient crosses a fold at any budget.
+    """
+
+    def __init__(self, n_splits=5, random_state=42, directory=SPLIT_DIR):
+        self.n_splits = n_splits
+        self.random_state = random_state
+        self.directory = directory
+
+    def split(self, X, y, groups):
+        if groups is None:
+            raise ValueError(f"PatientFolds needs groups={GROUP_COL!r} values")
+        return iter(get_folds(groups, y, self.n_splits, self.random_state, self.directory))
+
+    def get_n_splits(self, X=None, y=None, groups=None):
+        return self.n_splits
+
+
+# ======================
+# Train / test split
+# ======================
+def patient_train_test_split(df, test_size=0.2, random_state=42):
+    """``(X_train, X_test, y_train, y_test)`` with no patient on both sides.
+
+    ``df`` must still contain ``patient_nbr``; the test set is one fold of a
+    ``round(1 / test_size)``-fold patient-grouped split, so its class mix
+    matches the whole data.
+    """
+    if GROUP_COL not in df.columns:
+        raise ValueError(f"{GROUP_COL!r} is required for a patient-level split; load it with the data")
+    X, y = split_features(df)
+    train_idx, test_idx = get_folds(df[GROUP_COL], y, round(1 / test_size), random_state)[0]
+    return X.iloc[train_idx], X.iloc[test_idx], y.iloc[train_idx], y.iloc[test_idx]
+
+
+def patient_groups(df, index):
+    """``patient_nbr`` for the rows of ``index`` (e.g. ``X_train.index``)."""
+    return df.loc[index, GROUP_COL].to_numpy()
@@ -0,0 +1,359 @@
+"""Synthetic encounters with the ``diabetic_data.csv`` schema.
+
+The UCI extract is not shipped with the repository. :func:`generate` draws
+a frame with the same columns, raw values and approximate marginal
+distributions (age bins, admission codes, count columns, medication
+changes, ICD-9 ``diag_1..3`` codes, ``?`` for missing), so the pipelines
+and benchmarks run without the download. ``readmitted`` follows the
+53.9 / 34.9 / 11.2 % mix of the real data and depends on the utilisation
+columns, so the models have some signal to learn.
+
+Every column is drawn with vectorized NumPy (inverse-CDF lookups straight
+into categorical codes, no per-row Python), and :func:`write` streams
+fixed-size chunks through pyarrow's Parquet / CSV writers, so files of 10x
+to 100x the 101,766 UCI rows are written with one chunk in memory:
+
+    python synthetic.py --rows 100000 --output diabetic_data.csv
+    python synthetic.py --rows 10000000 --output cache/synthetic-10m.parquet
+"""
+import argparse
+import importlib
+import os
+import time
+from functools import lru_cache
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.csv as pa_csv
+import pyarrow.parquet as pq
+from joblib import Parallel, delayed
+
+from data import COLUMNS, DIAG_COLS, ID_COLS, MEDICATION_COLS, is_parquet
+from features import AGE_BINS
+
+# ======================
+# Configuration
+# ======================
+CHUNK_ROWS = 1_000_000
+
+# Buckets of the inverse-CDF guide table used for every categorical draw
+GUIDE_SIZE = 4096
+
+ENCOUNTER_ID_START = 2_000_000
+PATIENT_NBR_START = 100_000
+
+# encounter_id is int32 in the data cache; ids advance by up to 4 per encounter
+MAX_ROWS = (np.iinfo(np.int32).max - ENCOUNTER_ID_START) // 4
+
+# ======================
+# Marginals
+# ======================
+RACE = {'Caucasian': .748, 'AfricanAmerican': .189, '?': .022, 'Hispanic': .020, 'Other': .015, 'Asian': .006}
+
+GENDER = {'Female': .538, 'Male': .462}
+
+AGE = dict(zip(AGE_BINS, [.0016, .0068, .0163, .0371, .0952, .1696, .2209, .2562, .1690, .0273]))
+
+WEIGHT = {'?': .969, '[75-100)': .013, '[50-75)': .009, '[100-125)': .006, '[125-150)': .002, '[25-50)': .001}
+
+ADMISSION_TYPE = {1: .531, 3: .185, 2: .182, 6: .052, 5: .047, 8: .003}
+
+DISCHARGE_DISPOSITION = {1: .592, 3: .137, 6: .127, 18: .036, 2: .021, 22: .020, 11: .016, 5: .012,
+                         25: .010, 4: .008, 7: .006, 23: .004, 13: .004, 14: .004}
+
+ADMISSION_SOURCE = {7: .565, 1: .291, 17: .067, 4: .031, 6: .022, 2: .011, 5: .009, 3: .002, 20: .002}
+
+PAYER_CODE = {'?': .396, 'MC': .319, 'HM': .062, 'SP': .049, 'BC': .046, 'MD': .035, 'CP': .025,
+              'UN': .024, 'CM': .019, 'OG': .010, 'PO': .006, 'DM': .005, 'CH': .002, 'WC': .002}
+
+MEDICAL_SPECIALTY = {
+    '?': .491, 'InternalMedicine': .144, 'Emergency/Trauma': .074, 'Family/GeneralPractice': .073,
+    'Cardiology': .053, 'Surgery-General': .030, 'Nephrology': .016, 'Orthopedics': .014,
+    'Orthopedics-Reconstructive': .012, 'Radiologist': .011, 'Pulmonology': .009, 'Psychiatry': .009,
+    'Urology': .007, 'ObstetricsandGynecology': .007, 'Surgery-Cardiovascular/Thoracic': .006,
+    'Gastroenterology': .006, 'Surgery-Vascular': .005, 'Surgery-Neuro': .005, 'PhysicalMedicineandRehabilitation': .004,
+    'Oncology': .003, 'Pediatrics': .003, 'Hematology/Oncology': .002, 'Neurology': .002,
+    'Pediatrics-Endocrinology': .002, 'Otolaryngology': .001,
+}
+
+TIME_IN_HOSPITAL = np.array([.140, .169, .174, .137, .098, .074, .058, .043, .030, .023, .018, .014, .012, .010])
+
+NUM_PROCEDURES = np.array([.458, .204, .125, .093, .041, .030, .049])
+
+NUMBER_DIAGNOSES = dict(zip(range(1, 17), [.002, .010, .028, .054, .112, .100, .102, .104, .486,
+                                           .0002, .0001, .0001, .0001, .0001, .0001, .0004]))
+
+MAX_GLU_SERUM = {'None': .947, 'Norm': .026, '>200': .015, '>300': .012}
+
+A1C_RESULT = {'None': .833, '>8': .081, 'Norm': .049, '>7': .037}
+
+# Share of encounters on each medication; prescribed encounters split Steady / Up / Down
+MEDICATION_RATE = {
+    'metformin': .196, 'repaglinide': .015, 'nateglinide': .007, 'chlorpropamide': .001,
+    'glimepiride': .051, 'acetohexamide': .00001, 'glipizide': .125, 'glyburide': .105,
+    'tolbutamide': .0002, 'pioglitazone': .072, 'rosiglitazone': .063, 'acarbose': .003,
+    'miglitol': .0004, 'troglitazone': .00003, 'tolazamide': .0004, 'examide': 0.0, 'citoglipton': 0.0,
+    'insulin': .534, 'glyburide-metformin': .007, 'glipizide-metformin': .0001,
+    'glimepiride-pioglitazone': .00001, 'metformin-rosiglitazone': .00002, 'metformin-pioglitazone': .00001,
+}
+
+DOSE_CHANGE = {'Steady': .82, 'Up': .10, 'Down': .08}
+INSULIN_DOSE_CHANGE = {'Steady': .57, 'Up': .21, 'Down': .22}
+
+READMITTED = {'NO': .539, '>30': .349, '<30': .112}
+
+# Frequent ICD-9 codes per diagnosis slot; the rest of each slot's mass goes to a long tail
+DIAG_HEAD = {
+    'diag_1': {'428': .067, '414': .065, '786': .040, '410': .035, '486': .034, '427': .027, '491': .023,
+               '715': .022, '682': .020, '434': .020, '780': .020, '996': .019, '276': .019, '250.8': .017,
+               '599': .016, '38': .016, 'V57': .012, '584': .011, '250.6': .008, '820': .007},
+    'diag_2': {'276': .066, '428': .065, '250': .060, '427': .050, '401': .037, '496': .032, '599': .032,
+               '403': .028, '414': .026, '411': .025, '250.02': .021, '707': .019, '585': .019,
+               '584': .017, '491': .016, '250.01': .015, '285': .014, '780': .013, '425': .012, '682': .012},
+    'diag_3': {'250': .113, '401': .082, '276': .051, '428': .045, '427': .039, '414': .037, '496': .026,
+               '403': .023, '585': .020, '272': .020, '599': .019, 'V45': .019, '250.02': .014,
+               '707': .013, '780': .012, '285': .012, '425': .011, '250.6': .010, '424': .010, '305': .009},
+}
+DIAG_MISSING = {'diag_1': .0002, 'diag_2': .0035, 'diag_3': .014}
+DIAG_TAIL_SIZE = 800
+
+
+# ======================
+# Sampling helpers
+# ======================
+@lru_cache(maxsize=None)
+def _guide_table(weights):
+    """CDF of ``weights`` and a guide table: the first candidate code per 1/GUIDE_SIZE of [0, 1)."""
+    cdf = np.cumsum(np.asarray(weights, dtype=float))
+    cdf /= cdf[-1]
+    cdf[-1] = 1.0
+    guide = np.searchsorted(cdf, np.arange(GUIDE_SIZE) / GUIDE_SIZE, side='right').astype(np.int16)
+    return cdf, guide
+
+
+def _codes(rng, weights, n):
+    """``n`` draws of positions in ``weights`` by exact inverse-CDF lookup.
+
+    The guide table gives each uniform its code in one gather; only draws
+    whose bucket straddles a CDF step move on to the next code.
+    """
+    cdf, guide = _guide_table(tuple(weights))
+    u = rng.random(n, dtype=np.float32)
+    codes = guide[(u * GUIDE_SIZE).astype(np.int32)]
+    behind = np.flatnonzero(u >= cdf[codes])
+    while behind.size:
+        codes[behind] += 1
+        behind = behind[u[behind] >= cdf[codes[behind]]]
+    return codes
+
+
+def _categorical(rng, distribution, n):
+    return pd.Categorical.from_codes(_codes(rng, list(distribution.values()), n), categories=list(distribution))
+
+
+def _integers(rng, distribution, n, dtype):
+    values = np.fromiter(distribution, dtype=dtype)
+    return values[_codes(rng, list(distribution.values()), n)]
+
+
+def _zero_inflated(rng, n, p_zero, mean_nonzero, upper, dtype):
+    """Counts that are mostly zero, with a geometric tail."""
+    counts = rng.geometric(1 / mean_nonzero, size=n)
+    counts[rng.random(n, dtype=np.float32) < p_zero] = 0
+    return np.minimum(counts, upper).astype(dtype)
+
+
+def icd9_tail(size=DIAG_TAIL_SIZE, seed=0):
+    """A fixed pool of ``size`` plausible ICD-9 codes (numeric, V and E codes)."""
+    rng = np.random.default_rng(seed)
+    numeric = rng.choice(np.arange(1, 1000), size=int(size * .85), replace=False)
+    codes = [str(c) if rng.random() < .6 else f"{c}.{rng.integers(0, 10)}" for c in numeric]
+    codes += [f"V{rng.integers(1, 90):02d}" for _ in range(int(size * .1))]
+    codes += [f"E{rng.integers(800, 1000)}" for _ in range(size - len(codes))]
+    return list(dict.fromkeys(codes))
+
+
+@lru_cache(maxsize=None)
+def diagnosis_distribution(column):
+    """Head codes of ``column``, a Zipf-weighted tail over the rest of the mass, and ``?``."""
+    head = DIAG_HEAD[column]
+    tail = [c for c in icd9_tail() if c not in head]
+    tail_weights = 1 / np.arange(1, len(tail) + 1) ** 1.1
+    tail_mass = 1 - sum(head.values()) - DIAG_MISSING[column]
+    return {**head, **dict(zip(tail, tail_weights / tail_weights.sum() * tail_mass)), '?': DIAG_MISSING[column]}
+
+
+def _medications(rng, n):
+    """Medication columns plus the derived ``change`` and ``diabetesMed`` flags."""
+    columns = {}
+    dose_changed = np.zeros(n, dtype=bool)
+    on_medication = np.zeros(n, dtype=bool)
+    for med in MEDICATION_COLS:
+        changes = INSULIN_DOSE_CHANGE if med == 'insulin' else DOSE_CHANGE
+        prescribed = rng.random(n, dtype=np.float32) < MEDICATION_RATE[med]
+        # 0 = No, then Steady / Up / Down
+        codes = np.zeros(n, dtype=np.int8)
+        codes[prescribed] = _codes(rng, list(changes.values()), np.count_nonzero(prescribed)) + 1
+        columns[med] = pd.Categorical.from_codes(codes, categories=['No', *changes])
+        dose_changed |= codes >= 2
+        on_medication |= prescribed
+
+    # Starting or stopping a drug also counts as a change
+    changed = dose_changed | (on_medication & (rng.random(n, dtype=np.float32) < .35))
+    columns['change'] = pd.Categorical.from_codes(changed.astype(np.int8), categories=['No', 'Ch'])
+    columns['diabetesMed'] = pd.Categorical.from_codes(on_medication.astype(np.int8), categories=['No', 'Yes'])
+    return columns
+
+
+def _readmitted(rng, columns, n):
+    """``READMITTED`` mix assigned by rank of a noisy utilisation score."""
+    score = (
+        .45 * columns['number_inpatient'] + .25 * columns['number_emergency']
+        + .10 * columns['number_outpatient'] + .04 * columns['time_in_hospital']
+        + .03 * columns['number_diagnoses']
+        + .20 * np.isin(columns['discharge_disposition_id'], [3, 6, 22])
+        + rng.standard_normal(n, dtype=np.float32)
+    )
+    n_early = round(n * READMITTED['<30'])
+    n_late = round(n * READMITTED['>30'])
+    # Two partitions instead of a full sort: top n_early -> '<30', next n_late -> '>30'
+    order = np.argpartition(-score, [n_early, min(n_early + n_late, n - 1)]) if n > 1 else np.arange(n)
+    codes = np.zeros(n, dtype=np.int8)
+    codes[order[n_early:n_early + n_late]] = 1
+    codes[order[:n_early]] = 2
+    return pd.Categorical.from_codes(codes, categories=list(READMITTED))
+
+
+# ======================
+# Generator
+# ======================
+def n_patients_for(n_rows):
+    # Drawn from 1.3n ids, which leaves ~0.7 distinct patients per encounter as in the UCI extract
+    return max(1, int(n_rows * 1.3))
+
+
+def generate(n_rows, seed=42, offset=0, n_patients=None):
+    """``n_rows`` synthetic encounters in the raw ``diabetic_data.csv`` layout.
+
+    Columns have the dtypes of the ``data`` cache (category, int8/int16/int32),
+    so the frame looks like :func:`data.load_data` output. ``offset`` and
+    ``n_patients`` let chunks of a larger file continue the encounter ids and
+    share one patient population.
+    """
+    rng = np.random.default_rng(seed)
+    n = n_rows
+    if n_patients is None:
+        n_patients = n_patients_for(n)
+    if offset + n > MAX_ROWS:
+        raise ValueError(f"at most {MAX_ROWS:,} encounters fit the int32 encounter_id")
+
+    columns = {
+        'encounter_id': (ENCOUNTER_ID_START + (offset + np.arange(n)) * 4 + rng.integers(0, 4, n)).astype(np.int32),
+        'patient_nbr': (PATIENT_NBR_START + rng.integers(0, n_patients, n)).astype(np.int32),
+        'race': _categorical(rng, RACE, n),
+        'gender': _categorical(rng, GENDER, n),
+        'age': _categorical(rng, AGE, n),
+        'weight': _categorical(rng, WEIGHT, n),
+        'admission_type_id': _integers(rng, ADMISSION_TYPE, n, np.int8),
+        'discharge_disposition_id': _integers(rng, DISCHARGE_DISPOSITION, n, np.int8),
+        'admission_source_id': _integers(rng, ADMISSION_SOURCE, n, np.int8),
+        'time_in_hospital': (_codes(rng, TIME_IN_HOSPITAL, n) + 1).astype(np.int8),
+        'payer_code': _categorical(rng, PAYER_CODE, n),
+        'medical_specialty': _categorical(rng, MEDICAL_SPECIALTY, n),
+        'num_lab_procedures': np.clip(np.rint(rng.normal(43, 19.7, n)), 1, 132).astype(np.int16),
+        'num_procedures': _codes(rng, NUM_PROCEDURES, n).astype(np.int8),
+        'num_medications': np.clip(np.rint(rng.gamma(4, 4, n)), 1, 81).astype(np.int16),
+        'number_outpatient': _zero_inflated(rng, n, .836, 2.3, 42, np.int16),
+        'number_emergency': _zero_inflated(rng, n, .888, 1.8, 76, np.int16),
+        'number_inpatient': _zero_inflated(rng, n, .665, 1.9, 21, np.int16),
+        **{column: _categorical(rng, diagnosis_distribution(column), n) for column in DIAG_COLS},
+        'number_diagnoses': _integers(rng, NUMBER_DIAGNOSES, n, np.int8),
+        'max_glu_serum': _categorical(rng, MAX_GLU_SERUM, n),
+        'A1Cresult': _categorical(rng, A1C_RESULT, n),
+        **_medications(rng, n),
+    }
+    columns['readmitted'] = _readmitted(rng, columns, n)
+    return pd.DataFrame({column: columns[column] for column in COLUMNS})
+
+
+# ======================
+# Chunked output
+# ======================
+def _as_strings(table):
+    """Categorical (dictionary) columns decoded for the CSV writer."""
+    return table.cast(pa.schema([
+        pa.field(f.name, pa.string()) if pa.types.is_dictionary(f.type) else f for f in table.schema
+    ]))
+
+
+def _chunk_table(n_rows, seed, offset, n_patients, fmt):
+    table = pa.Table.from_pandas(generate(n_rows, seed, offset, n_patients), preserve_index=False)
+    return _as_strings(table) if fmt == 'csv' else table
+
+
+def _open_writer(sink, schema, fmt):
+    if fmt == 'csv':
+        # Unquoted, like the UCI file; Arrow always quotes its own header row
+        sink.write((','.join(schema.names) + '\n').encode())
+        return pa_csv.CSVWriter(sink, schema, write_options=pa_csv.WriteOptions(include_header=False, quoting_style='none'))
+    # Min/max statistics on the categoricals cost about as much as the rest of the write
+    return pq.ParquetWriter(sink, schema, write_statistics=ID_COLS)
+
+
+def write(path, n_rows, chunk_rows=CHUNK_ROWS, seed=42, fmt=None, n_jobs=1):
+    """Stream ``n_rows`` encounters to Parquet or CSV, ``chunk_rows`` at a time.
+
+    ``fmt`` defaults to the file extension. Chunks are generated by
+    ``n_jobs`` worker processes and written in order by this one, so memory
+    stays bounded by a few chunks. Every chunk has its own random stream
+    derived from ``seed``; output is reproducible for a given ``chunk_rows``.
+    """
+    fmt = fmt or ('parquet' if is_parquet(path) else 'csv')
+    if fmt not in ('parquet', 'csv'):
+        raise ValueError(f"Unknown format {fmt!r}; expected 'parquet' or 'csv'")
+    if n_rows > MAX_ROWS:
+        raise ValueError(f"at most {MAX_ROWS:,} encounters fit the int32 encounter_id")
+    n_patients = n_patients_for(n_rows)
+
+    # Workers unpickle the chunk function by module name; under ``python synthetic.py``
+    # this module is ``__main__``, so hand them the importable ``synthetic`` one
+    chunk_table = importlib.import_module('synthetic')._chunk_table if __name__ == '__main__' else _chunk_table
+    chunks = Parallel(n_jobs=n_jobs, return_as='generator')(
+        delayed(chunk_table)(min(chunk_rows, n_rows - start), (seed, i), start, n_patients, fmt)
+        for i, start in enumerate(range(0, n_rows, chunk_rows))
+    )
+    tmp = path + '.tmp'
+    writer = None
+    with open(tmp, 'wb') as sink:
+        try:
+            for table in chunks:
+                if writer is None:
+                    writer = _open_writer(sink, table.schema, fmt)
+                writer.write_table(table)
+        finally:
+            if writer is not None:
+                writer.close()
+    os.replace(tmp, path)
+    return path
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Write synthetic encounters in the diabetic_data.csv schema.")
+    parser.add_argument('--rows', type=int, default=101_766)
+    parser.add_argument('--chunk-rows', type=int, default=CHUNK_ROWS)
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--format', choices=['parquet', 'csv'], default=None,
+                        help="output format (default: from the file extension)")
+    parser.add_argument('--n-jobs', type=int, default=1, help="processes generating chunks (default: %(default)s)")
+    parser.add_argument('--output', default='synthetic_data.csv')
+    args = parser.parse_args(argv)
+
+    start = time.perf_counter()
+    write(args.output, args.rows, args.chunk_rows, args.seed, args.format, args.n_jobs)
+    seconds = time.perf_counter() - start
+    print(f"{args.rows:,} encounters -> {args.output} in {seconds:.1f}s ({args.rows / seconds:,.0f} rows/s)")
+
+
+if __name__ == '__main__':
+    main()